@@ -1,16 +1,35 @@
 from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from bson import ObjectId
+import jwt
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.low_level import Type as Argon2Type, hash_secret_raw
+from cryptography.fernet import Fernet, InvalidToken
+from argon2.exceptions import InvalidHashError, VerificationError
+from bson import ObjectId, Decimal128
+from bson.binary import Binary
+from bson.errors import InvalidId
+from cachetools import TTLCache
 from dotenv import load_dotenv
 import os
-import smtplib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import hashlib
+import re
+import zlib
+import orjson
+import aiosmtplib
+import jinja2
 import secrets
 import string
 from email.mime.text import MIMEText
@@ -18,7 +37,120 @@ from email.mime.multipart import MIMEMultipart
 
 load_dotenv()
 
-app = FastAPI(title="BambooClone HR API", version="1.0.0")
+def _json_default(value):
+    # BSON types orjson does not know about; everything else it encodes natively
+    if isinstance(value, (ObjectId, Decimal128)):
+        return str(value)
+    if isinstance(value, Binary):
+        return base64.b64encode(value).decode()
+    raise TypeError
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, which also handles ObjectId and datetime values"""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+class GzipRequestMiddleware:
+    """Inflates request bodies sent with Content-Encoding: gzip before they reach the routes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(
+            name == b"content-encoding" and value.lower() == b"gzip" for name, value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        # Bounded so a small compressed upload can't expand into an arbitrarily large body
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(b"".join(chunks), GZIP_REQUEST_MAX_BYTES)
+        except zlib.error:
+            await MongoJSONResponse({"detail": "Invalid gzip body"}, status_code=400)(scope, receive, send)
+            return
+        if inflater.unconsumed_tail:
+            await MongoJSONResponse({"detail": "Request body too large"}, status_code=413)(scope, receive, send)
+            return
+
+        headers = [(name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")]
+        headers.append((b"content-length", str(len(body)).encode()))
+        body_sent = False
+
+        async def receive_inflated():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app({**scope, "headers": headers}, receive_inflated, send)
+
+class ETagMiddleware:
+    """Tags fully rendered JSON GET responses with a content hash and answers a matching If-None-Match with 304
+
+    The handler still runs and encodes the body; what a 304 saves is sending it. Streamed responses
+    (stream_docs lists, which have no content-length) pass through untouched, so they stay incremental.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = next((value for name, value in scope["headers"] if name == b"if-none-match"), b"")
+        start = None
+
+        async def send_with_etag(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                if (
+                    message["status"] != 200
+                    or b"content-length" not in headers
+                    or not headers.get(b"content-type", b"").startswith(b"application/json")
+                ):
+                    start = False
+                    await send(message)
+                else:
+                    # Held back until the body is known; it arrives in one message
+                    start = message
+                return
+            if message["type"] != "http.response.body" or start is False:
+                await send(message)
+                return
+            if message.get("more_body", False):
+                # Chunked after all: don't buffer, send as is
+                await send(start)
+                start = False
+                await send(message)
+                return
+            body = message.get("body", b"")
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'.encode()
+            headers = [*start.get("headers", []), (b"etag", etag)]
+            if etag in (tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b",")):
+                headers = [(k, v) for k, v in headers if k != b"content-length"]
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers})
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+app = FastAPI(title="BambooClone HR API", version="1.0.0", default_response_class=MongoJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,22 +159,62 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Unchanged GET responses are revalidated with a 304 instead of being sent again
+app.add_middleware(ETagMiddleware)
+# Bulk responses (onboarding imports, list endpoints) are compressed for clients that accept gzip,
+# and gzip-compressed request bodies are accepted
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(GzipRequestMiddleware)
 
 # Config
 MONGO_URL = os.environ.get("MONGO_URL")
 DB_NAME = os.environ.get("DB_NAME")
 JWT_SECRET = os.environ.get("JWT_SECRET")
 JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
+# Falls back to the JWT secret so existing deployments keep working without a new variable
+SMTP_ENCRYPTION_SECRET = os.environ.get("SMTP_ENCRYPTION_SECRET") or JWT_SECRET
+if not SMTP_ENCRYPTION_SECRET:
+    raise RuntimeError("Set SMTP_ENCRYPTION_SECRET or JWT_SECRET, stored SMTP passwords are encrypted with it")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 480))
+AUTH_CACHE_TTL_SECONDS = int(os.environ.get("AUTH_CACHE_TTL_SECONDS", 30))
+REFERENCE_CACHE_TTL_SECONDS = int(os.environ.get("REFERENCE_CACHE_TTL_SECONDS", 60))
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", 19456))
+ARGON2_PARALLELISM = int(os.environ.get("ARGON2_PARALLELISM", 1))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+SMTP_TEST_TIMEOUT_SECONDS = float(os.environ.get("SMTP_TEST_TIMEOUT_SECONDS", 10))
+GZIP_REQUEST_MAX_BYTES = int(os.environ.get("GZIP_REQUEST_MAX_BYTES", 10 * 1024 * 1024))
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 5))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 60000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2500))
 
 # Database
-client = AsyncIOMotorClient(MONGO_URL)
+# One event loop multiplexes every request, so it needs far fewer sockets than a threaded server;
+# a few stay warm for bursts, idle ones are reaped, and pool exhaustion fails fast instead of queueing
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    serverSelectionTimeoutMS=2000,
+    retryWrites=True
+)
 db = client[DB_NAME]
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Verified token -> serialized user, so authenticated requests skip jwt.decode + users lookup
+_auth_cache = TTLCache(maxsize=10000, ttl=AUTH_CACHE_TTL_SECONDS)
+
+# Tenant id -> serialized list for read-mostly reference data; writes drop the affected entries
+_tenants_cache = TTLCache(maxsize=1, ttl=REFERENCE_CACHE_TTL_SECONDS)
+_departments_cache = TTLCache(maxsize=1024, ttl=REFERENCE_CACHE_TTL_SECONDS)
+_leave_types_cache = TTLCache(maxsize=1024, ttl=REFERENCE_CACHE_TTL_SECONDS)
+_email_config_cache = TTLCache(maxsize=1024, ttl=REFERENCE_CACHE_TTL_SECONDS)
+
 # Helper
 def str_id(doc):
     if doc and "_id" in doc:
@@ -51,20 +223,67 @@ def str_id(doc):
     return doc
 
 def serialize_doc(doc):
+    # Only renames _id; other ObjectId and datetime values are rendered by MongoJSONResponse.
+    # insert_one/insert_many set _id on the inserted dict, so freshly written docs can be passed as is
     if doc is None:
         return None
-    result = {}
-    for key, value in doc.items():
-        if key == "_id":
-            result["id"] = str(value)
-        elif isinstance(value, ObjectId):
-            result[key] = str(value)
-        elif isinstance(value, datetime):
-            result[key] = value.isoformat()
-        else:
-            result[key] = value
+    _id = doc.get("_id")
+    if _id is None:
+        return dict(doc)
+    result = {"id": str(_id), **doc}
+    del result["_id"]
     return result
 
+def tenant_query(user: dict) -> dict:
+    """Base query scoped to the user's tenant; super admins without a tenant see everything"""
+    return {"tenant_id": user["tenant_id"]} if user.get("tenant_id") else {}
+
+def parse_object_id(value: str) -> ObjectId:
+    """Parse a client-supplied id once, answering 400 for malformed ids instead of a 500"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid id")
+
+async def insert_many_skip_duplicates(collection, docs):
+    """Insert docs in one unordered batch; returns (inserted, duplicates) instead of failing on unique keys"""
+    if not docs:
+        return [], []
+    try:
+        await collection.insert_many(docs, ordered=False)
+        return docs, []
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        failed = {err["index"] for err in errors}
+        return (
+            [d for i, d in enumerate(docs) if i not in failed],
+            [d for i, d in enumerate(docs) if i in failed]
+        )
+
+async def _json_array_chunks(cursor, batch_size=100):
+    chunk = [b"["]
+    count = 0
+    async for doc in cursor:
+        if count:
+            chunk.append(b",")
+        chunk.append(orjson.dumps(serialize_doc(doc), default=_json_default, option=orjson.OPT_NON_STR_KEYS))
+        count += 1
+        if count % batch_size == 0:
+            yield b"".join(chunk)
+            chunk = []
+    chunk.append(b"]")
+    yield b"".join(chunk)
+
+def stream_docs(cursor, batch_size=100):
+    """Stream a cursor as a JSON array while it is iterated, instead of buffering every document"""
+    # Matching the wire batch to the output chunk lets each getMore overlap with encoding the previous batch
+    return StreamingResponse(
+        _json_array_chunks(cursor.batch_size(batch_size), batch_size),
+        media_type="application/json"
+    )
+
 # Models
 class TenantCreate(BaseModel):
     name: str
@@ -94,6 +313,9 @@ class EmployeeCreate(BaseModel):
     employment_type: str = "full-time"
     status: str = "active"
 
+class BulkEmployeeCreate(BaseModel):
+    employees: List[EmployeeCreate]
+
 class DepartmentCreate(BaseModel):
     name: str
     code: str
@@ -147,6 +369,26 @@ class TaskCreate(BaseModel):
     description: Optional[str] = None
     is_billable: bool = True
 
+class SetupTask(BaseModel):
+    name: str
+    description: Optional[str] = None
+    is_billable: bool = True
+
+class SetupProject(BaseModel):
+    name: str
+    code: str
+    description: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    budget_hours: Optional[float] = None
+    is_billable: bool = True
+    is_active: bool = True
+    tasks: List[SetupTask] = []
+
+class TimesheetSetup(BaseModel):
+    client: ClientCreate
+    projects: List[SetupProject] = []
+
 class TimesheetEntryCreate(BaseModel):
     date: str
     project_id: str
@@ -155,6 +397,9 @@ class TimesheetEntryCreate(BaseModel):
     description: Optional[str] = None
     is_billable: bool = True
 
+class BulkTimesheetEntryCreate(BaseModel):
+    entries: List[TimesheetEntryCreate]
+
 class TimesheetSubmit(BaseModel):
     week_start: str  # YYYY-MM-DD (Monday)
     entries: List[str]  # List of entry IDs
@@ -180,68 +425,87 @@ def generate_temp_password(length=12):
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
+# SMTP passwords are stored Fernet-encrypted; the key is derived once at import with Argon2id
+_smtp_fernet = Fernet(base64.urlsafe_b64encode(hash_secret_raw(
+    SMTP_ENCRYPTION_SECRET.encode(), salt=b"smtp-kdf-v1",
+    time_cost=2, memory_cost=19456, parallelism=1, hash_len=32, type=Argon2Type.ID
+)))
+# Marks encrypted values, so plaintext saved before encryption is never mistaken for a bad token
+_SMTP_PASSWORD_PREFIX = "enc:v1:"
+
+def encrypt_smtp_password(password: str) -> str:
+    return _SMTP_PASSWORD_PREFIX + _smtp_fernet.encrypt(password.encode()).decode()
+
+def smtp_password_is_encrypted(stored: Optional[str]) -> bool:
+    return bool(stored) and stored.startswith(_SMTP_PASSWORD_PREFIX)
+
+def decrypt_smtp_password(stored: Optional[str]) -> Optional[str]:
+    """Plain SMTP password, or None when it was encrypted with a different secret"""
+    if not smtp_password_is_encrypted(stored):
+        # Empty, or saved before encryption was introduced
+        return stored
+    try:
+        return _smtp_fernet.decrypt(stored[len(_SMTP_PASSWORD_PREFIX):].encode()).decode()
+    except InvalidToken:
+        print("Could not decrypt the stored SMTP password, SMTP_ENCRYPTION_SECRET changed since it was saved")
+        return None
+
 async def get_email_config(tenant_id: Optional[str] = None):
-    """Get email configuration for tenant"""
-    query = {"tenant_id": tenant_id} if tenant_id else {"tenant_id": None}
-    config = await db.email_config.find_one(query)
+    """Get email configuration for tenant, with the SMTP password decrypted"""
+    tenant_id = tenant_id or None
+    # "Not configured" is cached too, so tenants without SMTP settings don't query on every invite
+    if tenant_id in _email_config_cache:
+        return _email_config_cache[tenant_id]
+    config = await db.email_config.find_one({"tenant_id": tenant_id})
+    if config:
+        stored = config.get("smtp_password")
+        if stored and not smtp_password_is_encrypted(stored):
+            # Encrypt plaintext left from before encryption, unless a save replaced it meanwhile
+            await db.email_config.update_one(
+                {"_id": config["_id"], "smtp_password": stored},
+                {"$set": {"smtp_password": encrypt_smtp_password(stored)}}
+            )
+        config["smtp_password"] = decrypt_smtp_password(stored)
+    _email_config_cache[tenant_id] = config
     return config
 
-def send_welcome_email(
-    to_email: str,
-    employee_name: str,
-    temp_password: str,
-    company_name: str,
-    smtp_email: str,
-    smtp_password: str,
-    smtp_host: str = "smtp.gmail.com",
-    smtp_port: int = 587,
-    login_url: str = ""
-):
-    """Send welcome email to new employee"""
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"Welcome to {company_name} - Your Account Details"
-        msg['From'] = smtp_email
-        msg['To'] = to_email
-        
-        # Plain text version
-        text = f"""
-Welcome to {company_name}!
+# Email templates, compiled once at import; HTML is autoescaped since names are user-supplied
+_WELCOME_EMAIL_TEXT = jinja2.Template("""
+Welcome to {{ company_name }}!
 
-Hi {employee_name},
+Hi {{ employee_name }},
 
 Your HR account has been created. Here are your login details:
 
-Email: {to_email}
-Temporary Password: {temp_password}
+Email: {{ to_email }}
+Temporary Password: {{ temp_password }}
 
 Please login and change your password immediately.
 
-Login URL: {login_url if login_url else 'Contact your HR admin for the login link'}
+Login URL: {{ login_url or 'Contact your HR admin for the login link' }}
 
 Best regards,
-{company_name} HR Team
-        """
-        
-        # HTML version
-        html = f"""
+{{ company_name }} HR Team
+""")
+
+_WELCOME_EMAIL_HTML = jinja2.Template("""
 <!DOCTYPE html>
 <html>
 <head>
     <style>
-        body {{ font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #334155; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 40px 20px; }}
-        .header {{ text-align: center; margin-bottom: 30px; }}
-        .logo {{ width: 60px; height: 60px; background: #46A758; border-radius: 12px; display: inline-flex; align-items: center; justify-content: center; }}
-        .logo svg {{ width: 32px; height: 32px; fill: white; }}
-        h1 {{ color: #0F172A; font-size: 24px; margin: 20px 0 10px; }}
-        .card {{ background: #F8FAFC; border: 1px solid #E2E8F0; border-radius: 12px; padding: 24px; margin: 20px 0; }}
-        .credentials {{ background: white; border: 1px solid #E2E8F0; border-radius: 8px; padding: 16px; margin: 16px 0; }}
-        .label {{ font-size: 12px; color: #64748B; text-transform: uppercase; letter-spacing: 0.05em; }}
-        .value {{ font-size: 16px; font-weight: 600; color: #0F172A; margin-top: 4px; }}
-        .password {{ font-family: monospace; background: #FEF3C7; padding: 8px 12px; border-radius: 6px; display: inline-block; }}
-        .btn {{ display: inline-block; background: #46A758; color: white; text-decoration: none; padding: 12px 24px; border-radius: 8px; font-weight: 500; margin-top: 20px; }}
-        .footer {{ text-align: center; margin-top: 30px; font-size: 14px; color: #64748B; }}
+        body { font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #334155; }
+        .container { max-width: 600px; margin: 0 auto; padding: 40px 20px; }
+        .header { text-align: center; margin-bottom: 30px; }
+        .logo { width: 60px; height: 60px; background: #46A758; border-radius: 12px; display: inline-flex; align-items: center; justify-content: center; }
+        .logo svg { width: 32px; height: 32px; fill: white; }
+        h1 { color: #0F172A; font-size: 24px; margin: 20px 0 10px; }
+        .card { background: #F8FAFC; border: 1px solid #E2E8F0; border-radius: 12px; padding: 24px; margin: 20px 0; }
+        .credentials { background: white; border: 1px solid #E2E8F0; border-radius: 8px; padding: 16px; margin: 16px 0; }
+        .label { font-size: 12px; color: #64748B; text-transform: uppercase; letter-spacing: 0.05em; }
+        .value { font-size: 16px; font-weight: 600; color: #0F172A; margin-top: 4px; }
+        .password { font-family: monospace; background: #FEF3C7; padding: 8px 12px; border-radius: 6px; display: inline-block; }
+        .btn { display: inline-block; background: #46A758; color: white; text-decoration: none; padding: 12px 24px; border-radius: 8px; font-weight: 500; margin-top: 20px; }
+        .footer { text-align: center; margin-top: 30px; font-size: 14px; color: #64748B; }
     </style>
 </head>
 <body>
@@ -250,112 +514,73 @@ Best regards,
             <div class="logo">
                 <svg viewBox="0 0 24 24"><path d="M12 12c2.21 0 4-1.79 4-4s-1.79-4-4-4-4 1.79-4 4 1.79 4 4 4zm0 2c-2.67 0-8 1.34-8 4v2h16v-2c0-2.66-5.33-4-8-4z"/></svg>
             </div>
-            <h1>Welcome to {company_name}!</h1>
+            <h1>Welcome to {{ company_name }}!</h1>
             <p style="color: #64748B;">Your HR account has been created</p>
         </div>
         
         <div class="card">
-            <p>Hi <strong>{employee_name}</strong>,</p>
+            <p>Hi <strong>{{ employee_name }}</strong>,</p>
             <p>We're excited to have you on board! Your account has been set up in our HR system. Please use the credentials below to log in.</p>
             
             <div class="credentials">
                 <div style="margin-bottom: 12px;">
                     <div class="label">Email</div>
-                    <div class="value">{to_email}</div>
+                    <div class="value">{{ to_email }}</div>
                 </div>
                 <div>
                     <div class="label">Temporary Password</div>
-                    <div class="value"><span class="password">{temp_password}</span></div>
+                    <div class="value"><span class="password">{{ temp_password }}</span></div>
                 </div>
             </div>
             
             <p style="color: #DC2626; font-size: 14px;">⚠️ Please change your password immediately after your first login.</p>
             
-            {f'<a href="{login_url}" class="btn">Login to Your Account</a>' if login_url else ''}
+            {% if login_url %}<a href="{{ login_url }}" class="btn">Login to Your Account</a>{% endif %}
         </div>
         
         <div class="footer">
-            <p>Best regards,<br><strong>{company_name} HR Team</strong></p>
+            <p>Best regards,<br><strong>{{ company_name }} HR Team</strong></p>
             <p style="font-size: 12px; color: #94A3B8;">This is an automated message. Please do not reply to this email.</p>
         </div>
     </div>
 </body>
 </html>
-        """
-        
-        part1 = MIMEText(text, 'plain')
-        part2 = MIMEText(html, 'html')
-        msg.attach(part1)
-        msg.attach(part2)
-        
-        # Send email
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_email, smtp_password)
-            server.sendmail(smtp_email, to_email, msg.as_string())
-        
-        return True
-    except Exception as e:
-        print(f"Failed to send email to {to_email}: {str(e)}")
-        return False
+""", autoescape=True)
 
-def send_password_reset_email(
-    to_email: str,
-    user_name: str,
-    reset_token: str,
-    company_name: str,
-    smtp_email: str,
-    smtp_password: str,
-    smtp_host: str = "smtp.gmail.com",
-    smtp_port: int = 587,
-    reset_url: str = ""
-):
-    """Send password reset email"""
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"Reset Your Password - {company_name}"
-        msg['From'] = smtp_email
-        msg['To'] = to_email
-        
-        # Build reset link
-        reset_link = f"{reset_url}?token={reset_token}" if reset_url else f"Use this token to reset: {reset_token}"
-        
-        # Plain text version
-        text = f"""
+_RESET_EMAIL_TEXT = jinja2.Template("""
 Password Reset Request
 
-Hi {user_name},
+Hi {{ user_name }},
 
-We received a request to reset your password for your {company_name} account.
+We received a request to reset your password for your {{ company_name }} account.
 
 Click the link below to reset your password:
-{reset_link}
+{{ reset_link }}
 
 This link will expire in 1 hour.
 
 If you didn't request this, please ignore this email.
 
 Best regards,
-{company_name} HR Team
-        """
-        
-        # HTML version
-        html = f"""
+{{ company_name }} HR Team
+""")
+
+_RESET_EMAIL_HTML = jinja2.Template("""
 <!DOCTYPE html>
 <html>
 <head>
     <style>
-        body {{ font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #334155; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 40px 20px; }}
-        .header {{ text-align: center; margin-bottom: 30px; }}
-        .logo {{ width: 60px; height: 60px; background: #46A758; border-radius: 12px; display: inline-flex; align-items: center; justify-content: center; }}
-        h1 {{ color: #0F172A; font-size: 24px; margin: 20px 0 10px; }}
-        .card {{ background: #F8FAFC; border: 1px solid #E2E8F0; border-radius: 12px; padding: 24px; margin: 20px 0; }}
-        .btn {{ display: inline-block; background: #46A758; color: white; text-decoration: none; padding: 14px 28px; border-radius: 8px; font-weight: 600; margin: 20px 0; }}
-        .btn:hover {{ background: #16A34A; }}
-        .token {{ font-family: monospace; background: #FEF3C7; padding: 12px 16px; border-radius: 8px; display: inline-block; font-size: 18px; letter-spacing: 2px; }}
-        .warning {{ color: #DC2626; font-size: 14px; }}
-        .footer {{ text-align: center; margin-top: 30px; font-size: 14px; color: #64748B; }}
+        body { font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #334155; }
+        .container { max-width: 600px; margin: 0 auto; padding: 40px 20px; }
+        .header { text-align: center; margin-bottom: 30px; }
+        .logo { width: 60px; height: 60px; background: #46A758; border-radius: 12px; display: inline-flex; align-items: center; justify-content: center; }
+        h1 { color: #0F172A; font-size: 24px; margin: 20px 0 10px; }
+        .card { background: #F8FAFC; border: 1px solid #E2E8F0; border-radius: 12px; padding: 24px; margin: 20px 0; }
+        .btn { display: inline-block; background: #46A758; color: white; text-decoration: none; padding: 14px 28px; border-radius: 8px; font-weight: 600; margin: 20px 0; }
+        .btn:hover { background: #16A34A; }
+        .token { font-family: monospace; background: #FEF3C7; padding: 12px 16px; border-radius: 8px; display: inline-block; font-size: 18px; letter-spacing: 2px; }
+        .warning { color: #DC2626; font-size: 14px; }
+        .footer { text-align: center; margin-top: 30px; font-size: 14px; color: #64748B; }
     </style>
 </head>
 <body>
@@ -369,16 +594,16 @@ Best regards,
         </div>
         
         <div class="card">
-            <p>Hi <strong>{user_name}</strong>,</p>
-            <p>We received a request to reset the password for your {company_name} account.</p>
+            <p>Hi <strong>{{ user_name }}</strong>,</p>
+            <p>We received a request to reset the password for your {{ company_name }} account.</p>
             
             <div style="text-align: center;">
-                <a href="{reset_link}" class="btn">Reset Password</a>
+                <a href="{{ reset_link }}" class="btn">Reset Password</a>
             </div>
             
             <p style="text-align: center; color: #64748B; font-size: 14px;">Or use this reset token:</p>
             <div style="text-align: center;">
-                <span class="token">{reset_token}</span>
+                <span class="token">{{ reset_token }}</span>
             </div>
             
             <p class="warning" style="margin-top: 20px;">⏰ This link expires in 1 hour.</p>
@@ -386,50 +611,246 @@ Best regards,
         </div>
         
         <div class="footer">
-            <p>Best regards,<br><strong>{company_name} HR Team</strong></p>
+            <p>Best regards,<br><strong>{{ company_name }} HR Team</strong></p>
             <p style="font-size: 12px; color: #94A3B8;">This is an automated message. Please do not reply.</p>
         </div>
     </div>
 </body>
 </html>
-        """
-        
-        part1 = MIMEText(text, 'plain')
-        part2 = MIMEText(html, 'html')
-        msg.attach(part1)
-        msg.attach(part2)
-        
-        # Send email
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_email, smtp_password)
-            server.sendmail(smtp_email, to_email, msg.as_string())
-        
-        return True
+""", autoescape=True)
+
+async def _connect_smtp(smtp_email: str, smtp_password: str, smtp_host: str, smtp_port: int):
+    server = aiosmtplib.SMTP(hostname=smtp_host, port=smtp_port, start_tls=False)
+    await server.connect()
+    await server.starttls()
+    await server.login(smtp_email, smtp_password)
+    return server
+
+async def send_messages(
+    messages: List[MIMEMultipart],
+    smtp_email: str,
+    smtp_password: str,
+    smtp_host: str = "smtp.gmail.com",
+    smtp_port: int = 587
+) -> int:
+    """Deliver messages over a single SMTP session, reconnecting if the server drops it; returns the number sent"""
+    sent = 0
+    try:
+        server = await _connect_smtp(smtp_email, smtp_password, smtp_host, smtp_port)
     except Exception as e:
-        print(f"Failed to send password reset email to {to_email}: {str(e)}")
-        return False
+        print(f"Failed to connect to SMTP server {smtp_host}: {str(e)}")
+        return sent
+    try:
+        for msg in messages:
+            try:
+                try:
+                    await server.send_message(msg)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # Long batches can outlive the server's idle timeout; reconnect once and retry
+                    server = await _connect_smtp(smtp_email, smtp_password, smtp_host, smtp_port)
+                    await server.send_message(msg)
+                sent += 1
+            except Exception as e:
+                print(f"Failed to send email to {msg['To']}: {str(e)}")
+    finally:
+        try:
+            await server.quit()
+        except Exception:
+            pass
+    return sent
+
+def build_welcome_email(
+    to_email: str,
+    employee_name: str,
+    temp_password: str,
+    company_name: str,
+    smtp_email: str,
+    login_url: str = ""
+) -> MIMEMultipart:
+    """Build the welcome email for a new employee"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = f"Welcome to {company_name} - Your Account Details"
+    msg['From'] = smtp_email
+    msg['To'] = to_email
+    
+    context = {
+        "company_name": company_name,
+        "employee_name": employee_name,
+        "to_email": to_email,
+        "temp_password": temp_password,
+        "login_url": login_url
+    }
+    
+    # Plain text and HTML versions
+    msg.attach(MIMEText(_WELCOME_EMAIL_TEXT.render(**context), 'plain'))
+    msg.attach(MIMEText(_WELCOME_EMAIL_HTML.render(**context), 'html'))
+    return msg
+
+async def send_welcome_email(
+    to_email: str,
+    employee_name: str,
+    temp_password: str,
+    company_name: str,
+    smtp_email: str,
+    smtp_password: str,
+    smtp_host: str = "smtp.gmail.com",
+    smtp_port: int = 587,
+    login_url: str = ""
+):
+    """Send welcome email to new employee"""
+    msg = build_welcome_email(to_email, employee_name, temp_password, company_name, smtp_email, login_url)
+    return await send_messages([msg], smtp_email, smtp_password, smtp_host, smtp_port) == 1
+
+async def send_password_reset_email(
+    to_email: str,
+    user_name: str,
+    reset_token: str,
+    company_name: str,
+    smtp_email: str,
+    smtp_password: str,
+    smtp_host: str = "smtp.gmail.com",
+    smtp_port: int = 587,
+    reset_url: str = ""
+):
+    """Send password reset email"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = f"Reset Your Password - {company_name}"
+    msg['From'] = smtp_email
+    msg['To'] = to_email
+    
+    # Build reset link
+    reset_link = f"{reset_url}?token={reset_token}" if reset_url else f"Use this token to reset: {reset_token}"
+    
+    context = {
+        "company_name": company_name,
+        "user_name": user_name,
+        "reset_token": reset_token,
+        "reset_link": reset_link
+    }
+    
+    # Plain text and HTML versions
+    msg.attach(MIMEText(_RESET_EMAIL_TEXT.render(**context), 'plain'))
+    msg.attach(MIMEText(_RESET_EMAIL_HTML.render(**context), 'html'))
+    return await send_messages([msg], smtp_email, smtp_password, smtp_host, smtp_port) == 1
 
 # Auth helpers
+# New hashes are Argon2id; bcrypt hashes from before the switch still verify and are rehashed on login
+_password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=ARGON2_PARALLELISM
+)
+
+def _password_bytes(password: str) -> bytes:
+    # bcrypt only uses the first 72 bytes; truncate explicitly as passlib used to
+    return password.encode("utf-8")[:72]
+
+def _hash_password_sync(password: str) -> str:
+    return _password_hasher.hash(password)
+
+def _verify_password_sync(password: str, hashed: str) -> bool:
+    if hashed.startswith("$argon2"):
+        try:
+            return _password_hasher.verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    try:
+        return bcrypt.checkpw(_password_bytes(password), hashed.encode())
+    except ValueError:
+        return False
+
+def password_needs_rehash(hashed: str) -> bool:
+    """Legacy bcrypt hashes, or Argon2 hashes made with different cost parameters"""
+    return not hashed.startswith("$argon2") or _password_hasher.check_needs_rehash(hashed)
+
+# argon2 and bcrypt release the GIL while hashing, so a dedicated thread pool sized to the cores scales
+# like a process pool without pickling, and keeps hashing from starving the default executor
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+# Verified against when the user does not exist so login timing doesn't reveal registered emails
+_DUMMY_HASH = _hash_password_sync(secrets.token_urlsafe(16))
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, _hash_password_sync, password)
+
+async def verify_password(password: str, hashed: Optional[str]) -> bool:
+    """Verify a password off the event loop; always pays the hash cost"""
+    loop = asyncio.get_running_loop()
+    verified = await loop.run_in_executor(_password_executor, _verify_password_sync, password, hashed or _DUMMY_HASH)
+    return verified and hashed is not None
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def _auth_cache_key(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+def invalidate_auth(user_id: str):
+    """Drop cached auth entries for a user (e.g. after a password change)"""
+    for key, cached in list(_auth_cache.items()):
+        if cached.get("id") == user_id:
+            _auth_cache.pop(key, None)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    cache_key = _auth_cache_key(credentials.credentials)
+    cached = _auth_cache.get(cache_key)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        try:
+            user_oid = ObjectId(user_id)
+        except InvalidId:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        # User and tenant in one round-trip; the password hash stays out of the request context and the auth cache
+        user = await db.users.aggregate([
+            {"$match": {"_id": user_oid}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": "tenants",
+                "let": {"tenant_id": {"$convert": {"input": "$tenant_id", "to": "objectId", "onError": None, "onNull": None}}},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$tenant_id"]}}},
+                    {"$project": {"_id": 0, "name": 1, "domain": 1, "is_active": 1}}
+                ],
+                "as": "tenant"
+            }},
+            {"$addFields": {"tenant": {"$arrayElemAt": ["$tenant", 0]}}},
+            {"$project": {"password": 0}}
+        ]).to_list(1)
+        user = user[0] if user else None
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
-        return serialize_doc(user)
-    except JWTError:
+        user = serialize_doc(user)
+        _auth_cache[cache_key] = user
+        return user
+    except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+ADMIN_ROLES = frozenset({"super_admin", "admin"})
+HR_ROLES = frozenset({"super_admin", "admin", "hr"})
+MANAGER_ROLES = frozenset({"super_admin", "admin", "hr", "manager"})
+
+def require_roles(roles: frozenset, detail: str = "Access denied"):
+    """Dependency returning the current user, or 403 unless their role is in roles"""
+    async def dependency(user: dict = Depends(get_current_user)):
+        if user.get("role") not in roles:
+            raise HTTPException(status_code=403, detail=detail)
+        return user
+    return dependency
+
+# Built once so routes share the same dependency callables
+require_super_admin = require_roles(frozenset({"super_admin"}))
+require_admin = require_roles(ADMIN_ROLES)
+require_hr = require_roles(HR_ROLES)
+require_manager = require_roles(MANAGER_ROLES)
+
 # Health check
 @app.get("/api/health")
 async def health():
@@ -438,11 +859,7 @@ async def health():
 # Auth Routes
 @app.post("/api/auth/register")
 async def register(user: UserCreate):
-    existing = await db.users.find_one({"email": user.email})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await hash_password(user.password)
     user_doc = {
         "email": user.email,
         "password": hashed_password,
@@ -452,7 +869,15 @@ async def register(user: UserCreate):
         "created_at": datetime.now(timezone.utc),
         "is_active": True
     }
-    result = await db.users.insert_one(user_doc)
+    # The unique email index rejects duplicates; look them up only if it could not be built
+    if not unique_index_enforced(db.users, [("email", ASCENDING)]) and await db.users.find_one(
+        {"email": user.email}, {"_id": 1}
+    ):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        result = await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     token = create_access_token({"sub": str(result.inserted_id)})
     return {
         "message": "User registered successfully",
@@ -467,11 +892,15 @@ async def register(user: UserCreate):
     }
 
 @app.post("/api/auth/login")
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, background_tasks: BackgroundTasks):
     user = await db.users.find_one({"email": credentials.email})
-    if not user or not pwd_context.verify(credentials.password, user["password"]):
+    if not await verify_password(credentials.password, user["password"] if user else None):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    # Migrate bcrypt hashes to Argon2id while the plain password is at hand, after the response
+    if password_needs_rehash(user["password"]):
+        background_tasks.add_task(rehash_password, user["_id"], user["password"], credentials.password)
+    
     token = create_access_token({"sub": str(user["_id"])})
     return {
         "token": token,
@@ -484,9 +913,16 @@ async def login(credentials: UserLogin):
         }
     }
 
+async def rehash_password(user_id: ObjectId, verified_hash: str, password: str):
+    # Only replaces the hash that was verified, so a password change or reset in the meantime wins
+    await db.users.update_one(
+        {"_id": user_id, "password": verified_hash},
+        {"$set": {"password": await hash_password(password)}}
+    )
+
 @app.get("/api/auth/me")
 async def get_me(user: dict = Depends(get_current_user)):
-    return {"user": {k: v for k, v in user.items() if k != "password"}}
+    return MongoJSONResponse({"user": {k: v for k, v in user.items() if k != "password"}})
 
 # Password Reset Models
 class ForgotPasswordRequest(BaseModel):
@@ -504,24 +940,28 @@ class ChangePasswordRequest(BaseModel):
 @app.post("/api/auth/forgot-password")
 async def forgot_password(request: ForgotPasswordRequest, background_tasks: BackgroundTasks):
     """Request password reset - sends email with reset token"""
-    user = await db.users.find_one({"email": request.email})
+    user = await db.users.find_one(
+        {"email": request.email}, projection={"_id": 0, "full_name": 1, "tenant_id": 1}
+    )
     
-    # Always return success to prevent email enumeration
-    if not user:
+    # Always return success to prevent email enumeration. A user without either projected field
+    # comes back as {}, so only None means there is no account
+    if user is None:
         return {"message": "If an account exists with this email, you will receive a password reset link"}
     
     # Generate reset token (6 chars for easy typing)
     reset_token = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(6))
     
     # Store reset token with 1 hour expiry
+    now = datetime.now(timezone.utc)
     await db.password_resets.update_one(
         {"email": request.email},
         {
             "$set": {
                 "email": request.email,
                 "token": reset_token,
-                "created_at": datetime.now(timezone.utc),
-                "expires_at": datetime.now(timezone.utc) + timedelta(hours=1),
+                "created_at": now,
+                "expires_at": now + timedelta(hours=1),
                 "used": False
             }
         },
@@ -550,31 +990,35 @@ async def forgot_password(request: ForgotPasswordRequest, background_tasks: Back
 @app.post("/api/auth/reset-password")
 async def reset_password(request: ResetPasswordRequest):
     """Reset password using token"""
+    now = datetime.now(timezone.utc)
+    
     # Find valid reset token
     reset_record = await db.password_resets.find_one({
         "token": request.token.upper(),
         "used": False,
-        "expires_at": {"$gt": datetime.now(timezone.utc)}
+        "expires_at": {"$gt": now}
     })
     
     if not reset_record:
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
     
     # Update password
-    hashed_password = pwd_context.hash(request.new_password)
-    result = await db.users.update_one(
+    hashed_password = await hash_password(request.new_password)
+    reset_user = await db.users.find_one_and_update(
         {"email": reset_record["email"]},
         {
             "$set": {
                 "password": hashed_password,
                 "must_change_password": False,
-                "password_changed_at": datetime.now(timezone.utc)
+                "password_changed_at": now
             }
-        }
+        },
+        projection={"_id": 1}
     )
     
-    if result.matched_count == 0:
+    if not reset_user:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_auth(str(reset_user["_id"]))
     
     # Mark token as used
     await db.password_resets.update_one(
@@ -587,15 +1031,16 @@ async def reset_password(request: ResetPasswordRequest):
 @app.post("/api/auth/change-password")
 async def change_password(request: ChangePasswordRequest, user: dict = Depends(get_current_user)):
     """Change password for logged-in user"""
-    # Verify current password
-    db_user = await db.users.find_one({"_id": ObjectId(user.get("id"))})
-    if not db_user or not pwd_context.verify(request.current_password, db_user["password"]):
+    db_user = await db.users.find_one({"_id": ObjectId(user.get("id"))}, projection={"password": 1})
+    if not await verify_password(request.current_password, db_user["password"] if db_user else None):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
+    # Only hashed once the current password checks out, so wrong guesses don't cost a second hash
+    hashed_password = await hash_password(request.new_password)
+    
     # Update password
-    hashed_password = pwd_context.hash(request.new_password)
     await db.users.update_one(
-        {"_id": ObjectId(user.get("id"))},
+        {"_id": db_user["_id"]},
         {
             "$set": {
                 "password": hashed_password,
@@ -604,6 +1049,7 @@ async def change_password(request: ChangePasswordRequest, user: dict = Depends(g
             }
         }
     )
+    invalidate_auth(user.get("id"))
     
     return {"message": "Password changed successfully"}
 
@@ -623,10 +1069,10 @@ async def verify_reset_token(token: str):
 
 # Tenant Routes
 @app.post("/api/tenants")
-async def create_tenant(tenant: TenantCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") != "super_admin":
-        raise HTTPException(status_code=403, detail="Only super admin can create tenants")
-    
+async def create_tenant(
+    tenant: TenantCreate,
+    user: dict = Depends(require_roles(frozenset({"super_admin"}), "Only super admin can create tenants"))
+):
     tenant_doc = {
         "name": tenant.name,
         "domain": tenant.domain,
@@ -635,23 +1081,21 @@ async def create_tenant(tenant: TenantCreate, user: dict = Depends(get_current_u
         "is_active": True,
         "settings": {}
     }
-    result = await db.tenants.insert_one(tenant_doc)
-    return serialize_doc({**tenant_doc, "_id": result.inserted_id})
+    await db.tenants.insert_one(tenant_doc)
+    _tenants_cache.clear()
+    return serialize_doc(tenant_doc)
 
 @app.get("/api/tenants")
-async def get_tenants(user: dict = Depends(get_current_user)):
-    if user.get("role") != "super_admin":
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    tenants = await db.tenants.find().to_list(100)
-    return [serialize_doc(t) for t in tenants]
+async def get_tenants(user: dict = Depends(require_super_admin)):
+    tenants = _tenants_cache.get("all")
+    if tenants is None:
+        tenants = [serialize_doc(t) for t in await db.tenants.find().to_list(100)]
+        _tenants_cache["all"] = tenants
+    return MongoJSONResponse(tenants)
 
 # Department Routes
 @app.post("/api/departments")
-async def create_department(dept: DepartmentCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def create_department(dept: DepartmentCreate, user: dict = Depends(require_hr)):
     dept_doc = {
         "name": dept.name,
         "code": dept.code,
@@ -662,30 +1106,30 @@ async def create_department(dept: DepartmentCreate, user: dict = Depends(get_cur
         "created_at": datetime.now(timezone.utc),
         "is_active": True
     }
-    result = await db.departments.insert_one(dept_doc)
-    return serialize_doc({**dept_doc, "_id": result.inserted_id})
+    await db.departments.insert_one(dept_doc)
+    # Super admins' all-tenant list is cached under None too, so every entry goes, not just this tenant's
+    _departments_cache.clear()
+    return serialize_doc(dept_doc)
 
 @app.get("/api/departments")
 async def get_departments(user: dict = Depends(get_current_user)):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     
-    departments = await db.departments.find(query).to_list(100)
-    return [serialize_doc(d) for d in departments]
+    departments = _departments_cache.get(query.get("tenant_id"))
+    if departments is None:
+        departments = [serialize_doc(d) for d in await db.departments.find(query).to_list(100)]
+        _departments_cache[query.get("tenant_id")] = departments
+    return MongoJSONResponse(departments)
 
 @app.get("/api/departments/{dept_id}")
 async def get_department(dept_id: str, user: dict = Depends(get_current_user)):
-    dept = await db.departments.find_one({"_id": ObjectId(dept_id)})
+    dept = await db.departments.find_one({"_id": parse_object_id(dept_id)})
     if not dept:
         raise HTTPException(status_code=404, detail="Department not found")
-    return serialize_doc(dept)
+    return MongoJSONResponse(serialize_doc(dept))
 
 @app.put("/api/departments/{dept_id}")
-async def update_department(dept_id: str, dept: DepartmentCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def update_department(dept_id: str, dept: DepartmentCreate, user: dict = Depends(require_hr)):
     update_data = {
         "name": dept.name,
         "code": dept.code,
@@ -694,33 +1138,89 @@ async def update_department(dept_id: str, dept: DepartmentCreate, user: dict = D
         "parent_id": dept.parent_id,
         "updated_at": datetime.now(timezone.utc)
     }
-    result = await db.departments.update_one({"_id": ObjectId(dept_id)}, {"$set": update_data})
+    result = await db.departments.update_one({"_id": parse_object_id(dept_id)}, {"$set": update_data})
+    # Looked up by id only, so the owning tenant is unknown here
+    _departments_cache.clear()
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Department not found")
     return {"message": "Department updated"}
 
 @app.delete("/api/departments/{dept_id}")
-async def delete_department(dept_id: str, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    result = await db.departments.delete_one({"_id": ObjectId(dept_id)})
+async def delete_department(dept_id: str, user: dict = Depends(require_hr)):
+    result = await db.departments.delete_one({"_id": parse_object_id(dept_id)})
+    _departments_cache.clear()
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Department not found")
     return {"message": "Department deleted"}
 
 # Employee Routes
+# Fields returned by the employee directory; self-service profile fields stay on the detail endpoint
+EMPLOYEE_LIST_FIELDS = {
+    "employee_id": 1, "full_name": 1, "email": 1, "phone": 1, "department_id": 1,
+    "designation": 1, "date_of_joining": 1, "reporting_to": 1, "employment_type": 1,
+    "status": 1, "tenant_id": 1
+}
+
+def employee_search_fields(employee_id: str, full_name: str, email: str) -> dict:
+    """Lower-cased copies of the searchable fields, so search can use anchored index prefix matches"""
+    return {
+        "employee_id_lc": employee_id.lower(),
+        "full_name_lc": full_name.lower(),
+        "email_lc": email.lower()
+    }
+
+# The search fields are internal; reads project them out and freshly written docs drop them
+EMPLOYEE_HIDDEN_FIELDS = {"employee_id_lc": 0, "full_name_lc": 0, "email_lc": 0}
+
+def serialize_employee(doc):
+    result = serialize_doc(doc)
+    for field in EMPLOYEE_HIDDEN_FIELDS:
+        result.pop(field, None)
+    return result
+
+async def _seed_employee_counter(tenant_id: Optional[str], key: str):
+    """Start a new counter at the tenant's highest existing EMP#### number, so it never reissues old IDs"""
+    highest = await db.employees.aggregate([
+        {"$match": {"tenant_id": tenant_id, "employee_id": {"$regex": r"^EMP\d{1,18}$"}}},
+        {"$group": {"_id": None, "max": {"$max": {"$toLong": {"$substrCP": ["$employee_id", 3, 18]}}}}}
+    ]).to_list(1)
+    # $max keeps a concurrent seed or an already advanced counter from being moved backwards
+    await db.counters.update_one(
+        {"_id": key},
+        {"$max": {"seq": highest[0]["max"] if highest else 0}},
+        upsert=True
+    )
+
+async def next_employee_ids(tenant_id: Optional[str], n: int) -> List[str]:
+    """Reserve n unused employee IDs from the tenant's counter"""
+    key = f"emp_seq:{tenant_id}"
+    if await db.counters.find_one({"_id": key}, projection={"_id": 1}) is None:
+        await _seed_employee_counter(tenant_id, key)
+    
+    ids: List[str] = []
+    while len(ids) < n:
+        needed = n - len(ids)
+        counter = await db.counters.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"seq": needed}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        start = counter["seq"] - needed + 1
+        reserved = [f"EMP{str(start + i).zfill(4)}" for i in range(needed)]
+        # Manually created employees can hold numbers ahead of the counter; skip past those
+        taken = set(await db.employees.distinct("employee_id", {"tenant_id": tenant_id, "employee_id": {"$in": reserved}}))
+        ids.extend(i for i in reserved if i not in taken)
+    return ids
+
 @app.post("/api/employees")
-async def create_employee(emp: EmployeeCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    existing = await db.employees.find_one({
-        "$or": [
-            {"employee_id": emp.employee_id, "tenant_id": user.get("tenant_id")},
-            {"email": emp.email, "tenant_id": user.get("tenant_id")}
-        ]
-    })
+async def create_employee(emp: EmployeeCreate, user: dict = Depends(require_hr)):
+    # Employee ID uniqueness still needs a lookup, email is enforced by the index. Projecting
+    # only indexed fields lets the (tenant_id, employee_id) index answer it without a fetch
+    existing = await db.employees.find_one(
+        {"employee_id": emp.employee_id, "tenant_id": user.get("tenant_id")},
+        projection={"_id": 0, "employee_id": 1}
+    )
     if existing:
         raise HTTPException(status_code=400, detail="Employee ID or email already exists")
     
@@ -737,10 +1237,58 @@ async def create_employee(emp: EmployeeCreate, user: dict = Depends(get_current_
         "status": emp.status,
         "tenant_id": user.get("tenant_id"),
         "created_at": datetime.now(timezone.utc),
-        "created_by": user.get("id")
+        "created_by": user.get("id"),
+        **employee_search_fields(emp.employee_id, emp.full_name, emp.email)
+    }
+    try:
+        await db.employees.insert_one(emp_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Employee ID or email already exists")
+    return serialize_employee(emp_doc)
+
+@app.post("/api/employees/bulk")
+async def create_employees_bulk(data: BulkEmployeeCreate, user: dict = Depends(require_hr)):
+    """Create many employees in one batch, skipping employee IDs or emails that already exist"""
+    tenant_id = user.get("tenant_id")
+    existing_ids = {
+        e["employee_id"] async for e in db.employees.find(
+            {"tenant_id": tenant_id, "employee_id": {"$in": [emp.employee_id for emp in data.employees]}},
+            projection={"_id": 0, "employee_id": 1}
+        )
+    }
+    
+    now = datetime.now(timezone.utc)
+    emp_docs = []
+    skipped = []
+    for emp in data.employees:
+        if emp.employee_id in existing_ids:
+            skipped.append(emp.email)
+            continue
+        existing_ids.add(emp.employee_id)
+        emp_docs.append({
+            "employee_id": emp.employee_id,
+            "full_name": emp.full_name,
+            "email": emp.email,
+            "phone": emp.phone,
+            "department_id": emp.department_id,
+            "designation": emp.designation,
+            "date_of_joining": emp.date_of_joining,
+            "reporting_to": emp.reporting_to,
+            "employment_type": emp.employment_type,
+            "status": emp.status,
+            "tenant_id": tenant_id,
+            "created_at": now,
+            "created_by": user.get("id"),
+            **employee_search_fields(emp.employee_id, emp.full_name, emp.email)
+        })
+    
+    inserted, duplicates = await insert_many_skip_duplicates(db.employees, emp_docs)
+    skipped.extend(d["email"] for d in duplicates)
+    return {
+        "message": f"Created {len(inserted)} employees",
+        "created": [serialize_employee(d) for d in inserted],
+        "skipped": skipped
     }
-    result = await db.employees.insert_one(emp_doc)
-    return serialize_doc({**emp_doc, "_id": result.inserted_id})
 
 @app.get("/api/employees")
 async def get_employees(
@@ -749,35 +1297,37 @@ async def get_employees(
     search: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     if status:
         query["status"] = status
     if department_id:
         query["department_id"] = department_id
     if search:
+        # The employee_search text index matches whole words anywhere in the name; partial input is
+        # matched as an anchored prefix on the stored lower-cased fields, which walks their indexes
+        # instead of case-folding every document with an "i" regex
+        prefix = {"$regex": f"^{re.escape(search.lower())}"}
         query["$or"] = [
-            {"full_name": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}},
-            {"employee_id": {"$regex": search, "$options": "i"}}
+            {"$text": {"$search": search}},
+            {"full_name_lc": prefix},
+            {"email_lc": prefix},
+            {"employee_id_lc": prefix}
         ]
     
-    employees = await db.employees.find(query).to_list(500)
-    return [serialize_doc(e) for e in employees]
+    cursor = db.employees.find(query, projection=EMPLOYEE_LIST_FIELDS)
+    if search:
+        cursor = cursor.sort([("score", {"$meta": "textScore"})])
+    return stream_docs(cursor.limit(500))
 
 @app.get("/api/employees/{emp_id}")
 async def get_employee(emp_id: str, user: dict = Depends(get_current_user)):
-    emp = await db.employees.find_one({"_id": ObjectId(emp_id)})
+    emp = await db.employees.find_one({"_id": parse_object_id(emp_id)}, projection=EMPLOYEE_HIDDEN_FIELDS)
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
-    return serialize_doc(emp)
+    return MongoJSONResponse(serialize_doc(emp))
 
 @app.put("/api/employees/{emp_id}")
-async def update_employee(emp_id: str, emp: EmployeeCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def update_employee(emp_id: str, emp: EmployeeCreate, user: dict = Depends(require_hr)):
     update_data = {
         "employee_id": emp.employee_id,
         "full_name": emp.full_name,
@@ -789,19 +1339,20 @@ async def update_employee(emp_id: str, emp: EmployeeCreate, user: dict = Depends
         "reporting_to": emp.reporting_to,
         "employment_type": emp.employment_type,
         "status": emp.status,
-        "updated_at": datetime.now(timezone.utc)
+        "updated_at": datetime.now(timezone.utc),
+        **employee_search_fields(emp.employee_id, emp.full_name, emp.email)
     }
-    result = await db.employees.update_one({"_id": ObjectId(emp_id)}, {"$set": update_data})
+    try:
+        result = await db.employees.update_one({"_id": parse_object_id(emp_id)}, {"$set": update_data})
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Employee ID or email already exists")
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Employee not found")
     return {"message": "Employee updated"}
 
 @app.delete("/api/employees/{emp_id}")
-async def delete_employee(emp_id: str, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    result = await db.employees.delete_one({"_id": ObjectId(emp_id)})
+async def delete_employee(emp_id: str, user: dict = Depends(require_hr)):
+    result = await db.employees.delete_one({"_id": parse_object_id(emp_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Employee not found")
     return {"message": "Employee deleted"}
@@ -818,16 +1369,16 @@ class ProfileUpdate(BaseModel):
 @app.get("/api/me/profile")
 async def get_my_profile(user: dict = Depends(get_current_user)):
     """Get current user's employee profile"""
-    employee = await db.employees.find_one({"email": user.get("email")})
+    employee = await db.employees.find_one({"email": user.get("email")}, projection=EMPLOYEE_HIDDEN_FIELDS)
     if not employee:
         # Create a basic profile for non-employee users (like super_admin)
-        return {
+        return MongoJSONResponse({
             "id": user.get("id"),
             "full_name": user.get("full_name"),
             "email": user.get("email"),
             "role": user.get("role"),
             "is_employee": False
-        }
+        })
     
     # Get department name
     dept = None
@@ -838,12 +1389,12 @@ async def get_my_profile(user: dict = Depends(get_current_user)):
     profile["department_name"] = dept.get("name") if dept else None
     profile["is_employee"] = True
     profile["role"] = user.get("role")
-    return profile
+    return MongoJSONResponse(profile)
 
 @app.put("/api/me/profile")
 async def update_my_profile(profile: ProfileUpdate, user: dict = Depends(get_current_user)):
     """Update current user's employee profile"""
-    employee = await db.employees.find_one({"email": user.get("email")})
+    employee = await db.employees.find_one({"email": user.get("email")}, projection={"_id": 1})
     if not employee:
         raise HTTPException(status_code=404, detail="Employee profile not found")
     
@@ -867,15 +1418,7 @@ async def update_my_profile(profile: ProfileUpdate, user: dict = Depends(get_cur
 @app.get("/api/me/leave-balance")
 async def get_my_leave_balance(user: dict = Depends(get_current_user)):
     """Get current user's leave balance"""
-    employee = await db.employees.find_one({"email": user.get("email")})
-    
-    # Get leave types
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
-    leave_types = await db.leave_types.find(query).to_list(50)
-    
-    # Get approved leaves for current year
+    # Get approved leaves for current year, alongside the leave types
     current_year = datetime.now().year
     year_start = f"{current_year}-01-01"
     year_end = f"{current_year}-12-31"
@@ -885,7 +1428,10 @@ async def get_my_leave_balance(user: dict = Depends(get_current_user)):
         "status": "approved",
         "start_date": {"$gte": year_start, "$lte": year_end}
     }
-    approved_leaves = await db.leave_requests.find(leave_query).to_list(100)
+    leave_types, approved_leaves = await asyncio.gather(
+        db.leave_types.find(tenant_query(user)).to_list(50),
+        db.leave_requests.find(leave_query).to_list(100)
+    )
     
     # Calculate balance for each leave type
     balances = []
@@ -913,10 +1459,10 @@ async def get_my_leave_balance(user: dict = Depends(get_current_user)):
             "encashable": lt_data.get("encashable", False)
         })
     
-    return {
+    return MongoJSONResponse({
         "year": current_year,
         "balances": balances
-    }
+    })
 
 @app.get("/api/me/leaves")
 async def get_my_leaves(
@@ -931,10 +1477,11 @@ async def get_my_leaves(
     if year:
         query["start_date"] = {"$gte": f"{year}-01-01", "$lte": f"{year}-12-31"}
     
-    leaves = await db.leave_requests.find(query).sort("created_at", -1).to_list(100)
-    
-    # Enrich with leave type names
-    leave_types = await db.leave_types.find({}).to_list(50)
+    # Leaves and leave type names are independent reads
+    leaves, leave_types = await asyncio.gather(
+        db.leave_requests.find(query).sort("created_at", -1).to_list(100),
+        db.leave_types.find({}, projection={"name": 1}).to_list(50)
+    )
     lt_map = {str(lt["_id"]): lt["name"] for lt in leave_types}
     
     result = []
@@ -943,7 +1490,7 @@ async def get_my_leaves(
         leave_data["leave_type_name"] = lt_map.get(leave_data.get("leave_type_id"), "Unknown")
         result.append(leave_data)
     
-    return result
+    return MongoJSONResponse(result)
 
 @app.get("/api/me/attendance")
 async def get_my_attendance(
@@ -966,73 +1513,62 @@ async def get_my_attendance(
     present_days = sum(1 for r in records if r.get("status") == "present")
     absent_days = sum(1 for r in records if r.get("status") == "absent")
     
-    return {
+    return MongoJSONResponse({
         "records": [serialize_doc(r) for r in records],
         "summary": {
             "total_days": len(records),
             "present": present_days,
             "absent": absent_days
         }
-    }
+    })
 
 @app.get("/api/me/dashboard")
 async def get_employee_dashboard(user: dict = Depends(get_current_user)):
     """Get employee dashboard data"""
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
-    # Today's attendance
-    today_attendance = await db.attendance.find_one({
-        "user_id": user.get("id"),
-        "date": today
-    })
-    
-    # Pending leave requests
-    pending_leaves = await db.leave_requests.count_documents({
-        "user_id": user.get("id"),
-        "status": "pending"
-    })
+    now = datetime.now(timezone.utc)
+    today = now.date().isoformat()
+    current_month = now.month
+    current_year = now.year
     
-    # This month's attendance
     month_str = f"{current_year}-{str(current_month).zfill(2)}"
-    month_attendance = await db.attendance.find({
-        "user_id": user.get("id"),
-        "date": {"$regex": f"^{month_str}"}
-    }).to_list(50)
-    present_this_month = sum(1 for r in month_attendance if r.get("status") == "present")
     
-    # Recent leaves
-    recent_leaves = await db.leave_requests.find({
-        "user_id": user.get("id")
-    }).sort("created_at", -1).limit(5).to_list(5)
+    # None of these reads depend on each other, so issue them concurrently
+    today_attendance, pending_leaves, month_attendance, recent_leaves, leave_types, employee = await asyncio.gather(
+        # Today's attendance
+        db.attendance.find_one({"user_id": user.get("id"), "date": today}),
+        # Pending leave requests
+        db.leave_requests.count_documents({"user_id": user.get("id"), "status": "pending"}),
+        # This month's attendance
+        db.attendance.find({
+            "user_id": user.get("id"),
+            "date": {"$regex": f"^{month_str}"}
+        }).to_list(50),
+        # Recent leaves
+        db.leave_requests.find({"user_id": user.get("id")}).sort("created_at", -1).limit(5).to_list(5),
+        # Leave type names
+        db.leave_types.find({}, projection={"name": 1}).to_list(50),
+        # Employee profile
+        db.employees.find_one({"email": user.get("email")}, projection=EMPLOYEE_HIDDEN_FIELDS)
+    )
+    present_this_month = sum(1 for r in month_attendance if r.get("status") == "present")
     
-    # Get leave type names
-    leave_types = await db.leave_types.find({}).to_list(50)
     lt_map = {str(lt["_id"]): lt["name"] for lt in leave_types}
-    
     for leave in recent_leaves:
         leave["leave_type_name"] = lt_map.get(leave.get("leave_type_id"), "Unknown")
     
-    # Get employee profile
-    employee = await db.employees.find_one({"email": user.get("email")})
-    
-    return {
+    return MongoJSONResponse({
         "today_attendance": serialize_doc(today_attendance) if today_attendance else None,
         "pending_leaves": pending_leaves,
         "present_this_month": present_this_month,
         "recent_leaves": [serialize_doc(l) for l in recent_leaves],
         "employee": serialize_doc(employee) if employee else None
-    }
+    })
 
 # ============== TIMESHEET MODULE ==============
 
 # Client Routes
 @app.post("/api/clients")
-async def create_client(client: ClientCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def create_client(client: ClientCreate, user: dict = Depends(require_manager)):
     client_doc = {
         "name": client.name,
         "code": client.code.upper(),
@@ -1044,32 +1580,27 @@ async def create_client(client: ClientCreate, user: dict = Depends(get_current_u
         "created_at": datetime.now(timezone.utc),
         "created_by": user.get("id")
     }
-    result = await db.clients.insert_one(client_doc)
-    return serialize_doc({**client_doc, "_id": result.inserted_id})
+    await db.clients.insert_one(client_doc)
+    return serialize_doc(client_doc)
 
 @app.get("/api/clients")
 async def get_clients(active_only: bool = False, user: dict = Depends(get_current_user)):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     if active_only:
         query["is_active"] = True
     
     clients = await db.clients.find(query).sort("name", 1).to_list(100)
-    return [serialize_doc(c) for c in clients]
+    return MongoJSONResponse([serialize_doc(c) for c in clients])
 
 @app.get("/api/clients/{client_id}")
 async def get_client(client_id: str, user: dict = Depends(get_current_user)):
-    client = await db.clients.find_one({"_id": ObjectId(client_id)})
+    client = await db.clients.find_one({"_id": parse_object_id(client_id)})
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    return serialize_doc(client)
+    return MongoJSONResponse(serialize_doc(client))
 
 @app.put("/api/clients/{client_id}")
-async def update_client(client_id: str, client: ClientCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def update_client(client_id: str, client: ClientCreate, user: dict = Depends(require_manager)):
     update_data = {
         "name": client.name,
         "code": client.code.upper(),
@@ -1079,27 +1610,21 @@ async def update_client(client_id: str, client: ClientCreate, user: dict = Depen
         "is_active": client.is_active,
         "updated_at": datetime.now(timezone.utc)
     }
-    result = await db.clients.update_one({"_id": ObjectId(client_id)}, {"$set": update_data})
+    result = await db.clients.update_one({"_id": parse_object_id(client_id)}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
     return {"message": "Client updated"}
 
 @app.delete("/api/clients/{client_id}")
-async def delete_client(client_id: str, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    result = await db.clients.delete_one({"_id": ObjectId(client_id)})
+async def delete_client(client_id: str, user: dict = Depends(require_admin)):
+    result = await db.clients.delete_one({"_id": parse_object_id(client_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
     return {"message": "Client deleted"}
 
 # Project Routes
 @app.post("/api/projects")
-async def create_project(project: ProjectCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def create_project(project: ProjectCreate, user: dict = Depends(require_manager)):
     project_doc = {
         "name": project.name,
         "code": project.code.upper(),
@@ -1114,8 +1639,8 @@ async def create_project(project: ProjectCreate, user: dict = Depends(get_curren
         "created_at": datetime.now(timezone.utc),
         "created_by": user.get("id")
     }
-    result = await db.projects.insert_one(project_doc)
-    return serialize_doc({**project_doc, "_id": result.inserted_id})
+    await db.projects.insert_one(project_doc)
+    return serialize_doc(project_doc)
 
 @app.get("/api/projects")
 async def get_projects(
@@ -1123,18 +1648,17 @@ async def get_projects(
     active_only: bool = False,
     user: dict = Depends(get_current_user)
 ):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     if client_id:
         query["client_id"] = client_id
     if active_only:
         query["is_active"] = True
     
-    projects = await db.projects.find(query).sort("name", 1).to_list(200)
-    
-    # Enrich with client names
-    clients = await db.clients.find({}).to_list(100)
+    # Projects and the client names used to enrich them
+    projects, clients = await asyncio.gather(
+        db.projects.find(query).sort("name", 1).to_list(200),
+        db.clients.find({}, projection={"name": 1}).to_list(100)
+    )
     client_map = {str(c["_id"]): c["name"] for c in clients}
     
     result = []
@@ -1143,25 +1667,25 @@ async def get_projects(
         p_data["client_name"] = client_map.get(p_data.get("client_id"), "Unknown")
         result.append(p_data)
     
-    return result
+    return MongoJSONResponse(result)
 
 @app.get("/api/projects/{project_id}")
 async def get_project(project_id: str, user: dict = Depends(get_current_user)):
-    project = await db.projects.find_one({"_id": ObjectId(project_id)})
+    project = await db.projects.find_one({"_id": parse_object_id(project_id)})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Get client name
-    client = await db.clients.find_one({"_id": ObjectId(project.get("client_id"))})
+    # Client name and logged hours
+    client, hours_agg = await asyncio.gather(
+        db.clients.find_one({"_id": ObjectId(project.get("client_id"))}, projection={"name": 1}),
+        db.timesheet_entries.aggregate([
+            {"$match": {"project_id": project_id}},
+            {"$group": {"_id": None, "total_hours": {"$sum": "$hours"}, "billable_hours": {"$sum": {"$cond": ["$is_billable", "$hours", 0]}}}}
+        ]).to_list(1)
+    )
     p_data = serialize_doc(project)
     p_data["client_name"] = client.get("name") if client else "Unknown"
     
-    # Get logged hours
-    hours_agg = await db.timesheet_entries.aggregate([
-        {"$match": {"project_id": project_id}},
-        {"$group": {"_id": None, "total_hours": {"$sum": "$hours"}, "billable_hours": {"$sum": {"$cond": ["$is_billable", "$hours", 0]}}}}
-    ]).to_list(1)
-    
     if hours_agg:
         p_data["logged_hours"] = hours_agg[0].get("total_hours", 0)
         p_data["billable_hours"] = hours_agg[0].get("billable_hours", 0)
@@ -1169,13 +1693,10 @@ async def get_project(project_id: str, user: dict = Depends(get_current_user)):
         p_data["logged_hours"] = 0
         p_data["billable_hours"] = 0
     
-    return p_data
+    return MongoJSONResponse(p_data)
 
 @app.put("/api/projects/{project_id}")
-async def update_project(project_id: str, project: ProjectCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def update_project(project_id: str, project: ProjectCreate, user: dict = Depends(require_manager)):
     update_data = {
         "name": project.name,
         "code": project.code.upper(),
@@ -1188,11 +1709,18 @@ async def update_project(project_id: str, project: ProjectCreate, user: dict = D
         "is_active": project.is_active,
         "updated_at": datetime.now(timezone.utc)
     }
-    result = await db.projects.update_one({"_id": ObjectId(project_id)}, {"$set": update_data})
+    result = await db.projects.update_one({"_id": parse_object_id(project_id)}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
     return {"message": "Project updated"}
 
+@app.delete("/api/projects/{project_id}")
+async def delete_project(project_id: str, user: dict = Depends(require_admin)):
+    result = await db.projects.delete_one({"_id": parse_object_id(project_id)})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"message": "Project deleted"}
+
 # Task Routes
 @app.post("/api/tasks")
 async def create_task(task: TaskCreate, user: dict = Depends(get_current_user)):
@@ -1204,19 +1732,83 @@ async def create_task(task: TaskCreate, user: dict = Depends(get_current_user)):
         "tenant_id": user.get("tenant_id"),
         "created_at": datetime.now(timezone.utc)
     }
-    result = await db.tasks.insert_one(task_doc)
-    return serialize_doc({**task_doc, "_id": result.inserted_id})
+    await db.tasks.insert_one(task_doc)
+    return serialize_doc(task_doc)
+
+@app.post("/api/timesheet/setup")
+async def create_timesheet_setup(data: TimesheetSetup, user: dict = Depends(require_manager)):
+    """Create a client with its projects and their tasks in one request"""
+    now = datetime.now(timezone.utc)
+    tenant_id = user.get("tenant_id")
+    # Ids are assigned up front so the children can reference their parents and all three
+    # collections are written concurrently
+    client_doc = {
+        "_id": ObjectId(),
+        "name": data.client.name,
+        "code": data.client.code.upper(),
+        "description": data.client.description,
+        "contact_person": data.client.contact_person,
+        "contact_email": data.client.contact_email,
+        "is_active": data.client.is_active,
+        "tenant_id": tenant_id,
+        "created_at": now,
+        "created_by": user.get("id")
+    }
+    project_docs, task_docs = [], []
+    for project in data.projects:
+        project_doc = {
+            "_id": ObjectId(),
+            "name": project.name,
+            "code": project.code.upper(),
+            "client_id": str(client_doc["_id"]),
+            "description": project.description,
+            "start_date": project.start_date,
+            "end_date": project.end_date,
+            "budget_hours": project.budget_hours,
+            "is_billable": project.is_billable,
+            "is_active": project.is_active,
+            "tenant_id": tenant_id,
+            "created_at": now,
+            "created_by": user.get("id")
+        }
+        project_docs.append(project_doc)
+        task_docs.append([
+            {
+                "_id": ObjectId(),
+                "name": task.name,
+                "project_id": str(project_doc["_id"]),
+                "description": task.description,
+                "is_billable": task.is_billable,
+                "tenant_id": tenant_id,
+                "created_at": now
+            }
+            for task in project.tasks
+        ])
+    all_tasks = [task for tasks in task_docs for task in tasks]
+    
+    writes = [db.clients.insert_one(client_doc)]
+    if project_docs:
+        writes.append(db.projects.insert_many(project_docs))
+    if all_tasks:
+        writes.append(db.tasks.insert_many(all_tasks))
+    await asyncio.gather(*writes)
+    
+    return {
+        "client": serialize_doc(client_doc),
+        "projects": [
+            {**serialize_doc(project_doc), "tasks": [serialize_doc(t) for t in tasks]}
+            for project_doc, tasks in zip(project_docs, task_docs)
+        ]
+    }
 
 @app.get("/api/tasks")
 async def get_tasks(project_id: Optional[str] = None, user: dict = Depends(get_current_user)):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     if project_id:
         query["project_id"] = project_id
     
     tasks = await db.tasks.find(query).to_list(200)
-    return [serialize_doc(t) for t in tasks]
+    return MongoJSONResponse([serialize_doc(t) for t in tasks])
 
 # Timesheet Entry Routes
 @app.post("/api/timesheets/entries")
@@ -1226,40 +1818,97 @@ async def create_timesheet_entry(entry: TimesheetEntryCreate, user: dict = Depen
         raise HTTPException(status_code=400, detail="Hours must be between 0 and 24")
     
     # Check if entry already exists for this date/project/user
-    existing = await db.timesheet_entries.find_one({
+    key = {
         "user_id": user.get("id"),
         "date": entry.date,
         "project_id": entry.project_id,
         "task_id": entry.task_id
-    })
+    }
+    changes = {"hours": entry.hours, "description": entry.description, "is_billable": entry.is_billable}
+    existing = await db.timesheet_entries.find_one(key)
+    
+    if not existing:
+        entry_doc = {
+            **key,
+            **changes,
+            "status": "draft",  # draft, submitted, approved, rejected
+            "tenant_id": user.get("tenant_id"),
+            "created_at": datetime.now(timezone.utc)
+        }
+        try:
+            await db.timesheet_entries.insert_one(entry_doc)
+            return serialize_doc(entry_doc)
+        except DuplicateKeyError:
+            # A concurrent save created the same entry first; update that one instead
+            existing = await db.timesheet_entries.find_one(key)
+            if not existing:
+                raise HTTPException(status_code=409, detail="Timesheet entry changed concurrently, try again")
+    
+    # Update existing entry
+    await db.timesheet_entries.update_one(
+        {"_id": existing["_id"]},
+        {"$set": {**changes, "updated_at": datetime.now(timezone.utc)}}
+    )
+    existing.update(changes)
+    return serialize_doc(existing)
+
+@app.post("/api/timesheets/entries/bulk")
+async def create_timesheet_entries_bulk(data: BulkTimesheetEntryCreate, user: dict = Depends(get_current_user)):
+    """Create or update several timesheet entries in one request, with the same per-entry rules"""
+    if any(entry.hours <= 0 or entry.hours > 24 for entry in data.entries):
+        raise HTTPException(status_code=400, detail="Hours must be between 0 and 24")
     
-    if existing:
-        # Update existing entry
-        await db.timesheet_entries.update_one(
-            {"_id": existing["_id"]},
-            {"$set": {
-                "hours": entry.hours,
-                "description": entry.description,
-                "is_billable": entry.is_billable,
-                "updated_at": datetime.now(timezone.utc)
-            }}
-        )
-        return serialize_doc({**existing, "hours": entry.hours, "description": entry.description})
+    # Entries are keyed like the single create (user, date, project, task); a repeated key in the
+    # batch updates the same entry, so the last one wins
+    user_id = user.get("id")
+    entries = {(e.date, e.project_id, e.task_id): e for e in data.entries}
+    if not entries:
+        return {"message": "Saved 0 entries", "entries": []}
     
-    entry_doc = {
-        "user_id": user.get("id"),
-        "date": entry.date,
-        "project_id": entry.project_id,
-        "task_id": entry.task_id,
-        "hours": entry.hours,
-        "description": entry.description,
-        "is_billable": entry.is_billable,
-        "status": "draft",  # draft, submitted, approved, rejected
-        "tenant_id": user.get("tenant_id"),
-        "created_at": datetime.now(timezone.utc)
-    }
-    result = await db.timesheet_entries.insert_one(entry_doc)
-    return serialize_doc({**entry_doc, "_id": result.inserted_id})
+    now = datetime.now(timezone.utc)
+    upserts = [
+        UpdateOne(
+            {"user_id": user_id, "date": date, "project_id": project_id, "task_id": task_id},
+            {
+                "$set": {
+                    "hours": entry.hours,
+                    "description": entry.description,
+                    "is_billable": entry.is_billable,
+                    "updated_at": now
+                },
+                "$setOnInsert": {
+                    "status": "draft",
+                    "tenant_id": user.get("tenant_id"),
+                    "created_at": now
+                }
+            },
+            upsert=True
+        )
+        for (date, project_id, task_id), entry in entries.items()
+    ]
+    try:
+        await db.timesheet_entries.bulk_write(upserts, ordered=False)
+    except BulkWriteError as e:
+        # Upserts that raced a concurrent save of the same key lost on the unique index; run
+        # them once more, when they match the entry the other save inserted and update it
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        await db.timesheet_entries.bulk_write([upserts[err["index"]] for err in errors], ordered=False)
+    
+    saved = await db.timesheet_entries.find({
+        "user_id": user_id,
+        "$or": [
+            {"date": date, "project_id": project_id, "task_id": task_id}
+            for date, project_id, task_id in entries
+        ]
+    }).sort("_id", 1).to_list(None)
+    # Duplicates can only predate the unique index; the oldest entry per key is the one reported
+    by_key = {}
+    for e in saved:
+        by_key.setdefault((e["date"], e["project_id"], e.get("task_id")), e)
+    result = [serialize_doc(by_key[key]) for key in entries if key in by_key]
+    return {"message": f"Saved {len(result)} entries", "entries": result}
 
 @app.get("/api/timesheets/entries")
 async def get_timesheet_entries(
@@ -1270,7 +1919,7 @@ async def get_timesheet_entries(
     status: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
-    query = {}
+    query = tenant_query(user)
     
     # If not admin, only show own entries
     if user.get("role") == "employee":
@@ -1278,9 +1927,6 @@ async def get_timesheet_entries(
     elif user_id:
         query["user_id"] = user_id
     
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
-    
     if week_start:
         # Get entries for the week (Mon-Sun)
         week_end = (datetime.strptime(week_start, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d")
@@ -1291,16 +1937,15 @@ async def get_timesheet_entries(
     if status:
         query["status"] = status
     
-    entries = await db.timesheet_entries.find(query).sort("date", 1).to_list(500)
-    
-    # Enrich with project/client names
-    projects = await db.projects.find({}).to_list(200)
+    # Entries plus the project/client/user names used to enrich them
+    entries, projects, clients, users = await asyncio.gather(
+        db.timesheet_entries.find(query).sort("date", 1).to_list(500),
+        db.projects.find({}, projection={"name": 1, "client_id": 1}).to_list(200),
+        db.clients.find({}, projection={"name": 1}).to_list(100),
+        db.users.find({}, projection={"full_name": 1}).to_list(500)
+    )
     project_map = {str(p["_id"]): p for p in projects}
-    
-    clients = await db.clients.find({}).to_list(100)
     client_map = {str(c["_id"]): c["name"] for c in clients}
-    
-    users = await db.users.find({}).to_list(500)
     user_map = {str(u["_id"]): u.get("full_name", "Unknown") for u in users}
     
     result = []
@@ -1312,11 +1957,12 @@ async def get_timesheet_entries(
         e_data["user_name"] = user_map.get(e_data.get("user_id"), "Unknown")
         result.append(e_data)
     
-    return result
+    return MongoJSONResponse(result)
 
 @app.delete("/api/timesheets/entries/{entry_id}")
 async def delete_timesheet_entry(entry_id: str, user: dict = Depends(get_current_user)):
-    entry = await db.timesheet_entries.find_one({"_id": ObjectId(entry_id)})
+    entry_oid = parse_object_id(entry_id)
+    entry = await db.timesheet_entries.find_one({"_id": entry_oid})
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
     
@@ -1327,7 +1973,7 @@ async def delete_timesheet_entry(entry_id: str, user: dict = Depends(get_current
     if entry.get("status") not in ["draft", "rejected"] and user.get("role") not in ["super_admin", "admin"]:
         raise HTTPException(status_code=400, detail="Cannot delete submitted/approved entries")
     
-    await db.timesheet_entries.delete_one({"_id": ObjectId(entry_id)})
+    await db.timesheet_entries.delete_one({"_id": entry_oid})
     return {"message": "Entry deleted"}
 
 @app.post("/api/timesheets/submit")
@@ -1358,12 +2004,9 @@ async def submit_timesheet(data: TimesheetSubmit, user: dict = Depends(get_curre
 async def approve_timesheet(
     user_id: str,
     week_start: str,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(require_manager)
 ):
     """Approve submitted timesheet entries (manager/admin only)"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     week_end = (datetime.strptime(week_start, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d")
     
     result = await db.timesheet_entries.update_many(
@@ -1386,12 +2029,9 @@ async def reject_timesheet(
     user_id: str,
     week_start: str,
     reason: Optional[str] = None,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(require_manager)
 ):
     """Reject submitted timesheet entries (manager/admin only)"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     week_end = (datetime.strptime(week_start, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d")
     
     result = await db.timesheet_entries.update_many(
@@ -1418,14 +2058,11 @@ async def get_timesheet_summary(
     user: dict = Depends(get_current_user)
 ):
     """Get timesheet summary for user or team"""
-    query = {}
+    query = tenant_query(user)
     
     if user.get("role") == "employee":
         query["user_id"] = user.get("id")
     
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
-    
     if week_start:
         week_end = (datetime.strptime(week_start, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d")
         query["date"] = {"$gte": week_start, "$lte": week_end}
@@ -1437,7 +2074,10 @@ async def get_timesheet_summary(
             month_end = f"{year}-{str(month+1).zfill(2)}-01"
         query["date"] = {"$gte": month_start, "$lt": month_end}
     
-    entries = await db.timesheet_entries.find(query).to_list(1000)
+    entries, projects = await asyncio.gather(
+        db.timesheet_entries.find(query).to_list(1000),
+        db.projects.find({}, projection={"name": 1}).to_list(200)
+    )
     
     total_hours = sum(e.get("hours", 0) for e in entries)
     billable_hours = sum(e.get("hours", 0) for e in entries if e.get("is_billable"))
@@ -1453,8 +2093,7 @@ async def get_timesheet_summary(
         if e.get("is_billable"):
             project_hours[pid]["billable"] += e.get("hours", 0)
     
-    # Get project names
-    projects = await db.projects.find({}).to_list(200)
+    # Project names
     project_map = {str(p["_id"]): p["name"] for p in projects}
     
     by_project = [
@@ -1473,7 +2112,7 @@ async def get_timesheet_summary(
     approved_count = sum(1 for e in entries if e.get("status") == "approved")
     rejected_count = sum(1 for e in entries if e.get("status") == "rejected")
     
-    return {
+    return MongoJSONResponse({
         "total_hours": total_hours,
         "billable_hours": billable_hours,
         "non_billable_hours": non_billable_hours,
@@ -1486,23 +2125,18 @@ async def get_timesheet_summary(
             "rejected": rejected_count
         },
         "entry_count": len(entries)
-    }
+    })
 
 @app.get("/api/timesheets/pending-approvals")
-async def get_pending_approvals(user: dict = Depends(get_current_user)):
+async def get_pending_approvals(user: dict = Depends(require_manager)):
     """Get pending timesheet approvals (manager/admin only)"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
+    query = {"status": "submitted", **tenant_query(user)}
     
-    query = {"status": "submitted"}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
-    
-    # Group by user and week
-    entries = await db.timesheet_entries.find(query).to_list(500)
-    
-    # Get user names
-    users = await db.users.find({}).to_list(500)
+    # Submitted entries and user names
+    entries, users = await asyncio.gather(
+        db.timesheet_entries.find(query).to_list(500),
+        db.users.find({}, projection={"full_name": 1}).to_list(500)
+    )
     user_map = {str(u["_id"]): u.get("full_name", "Unknown") for u in users}
     
     # Group by user_id and week
@@ -1524,50 +2158,58 @@ async def get_pending_approvals(user: dict = Depends(get_current_user)):
         pending[key]["total_hours"] += e.get("hours", 0)
         pending[key]["entry_count"] += 1
     
-    return list(pending.values())
+    return MongoJSONResponse(list(pending.values()))
 
 # ============== REPORTS & ANALYTICS ==============
 
 @app.get("/api/reports/dashboard")
-async def get_reports_dashboard(user: dict = Depends(get_current_user)):
+async def get_reports_dashboard(user: dict = Depends(require_manager)):
     """Get main dashboard analytics"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
-    
-    # Employee stats
-    total_employees = await db.employees.count_documents({**query, "status": "active"})
-    total_departments = await db.departments.count_documents(query)
-    
-    # Today's attendance
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    present_today = await db.attendance.count_documents({**query, "date": today, "status": "present"})
+    query = tenant_query(user)
     
-    # Leave stats
-    pending_leaves = await db.leave_requests.count_documents({**query, "status": "pending"})
-    approved_leaves_month = await db.leave_requests.count_documents({
-        **query, 
-        "status": "approved",
-        "start_date": {"$gte": datetime.now().strftime("%Y-%m-01")}
-    })
-    
-    # Timesheet stats (current month)
-    current_month = datetime.now().month
-    current_year = datetime.now().year
+    now = datetime.now(timezone.utc)
+    today = now.date().isoformat()
+    current_month = now.month
+    current_year = now.year
     month_start = f"{current_year}-{str(current_month).zfill(2)}-01"
     
-    timesheet_entries = await db.timesheet_entries.find({
-        **query,
-        "date": {"$gte": month_start}
-    }).to_list(5000)
+    (
+        total_employees, total_departments, present_today, leave_stats, hour_totals
+    ) = await asyncio.gather(
+        # Employee stats
+        db.employees.count_documents({**query, "status": "active"}),
+        db.departments.count_documents(query),
+        # Today's attendance
+        db.attendance.count_documents({**query, "date": today, "status": "present"}),
+        # Leave stats, both counts from one pass over the tenant's requests
+        db.leave_requests.aggregate([
+            {"$match": query},
+            {"$facet": {
+                "pending": [{"$match": {"status": "pending"}}, {"$count": "n"}],
+                "approved_this_month": [
+                    {"$match": {"status": "approved", "start_date": {"$gte": month_start}}},
+                    {"$count": "n"}
+                ]
+            }}
+        ]).to_list(1),
+        # Timesheet stats (current month), summed server-side instead of shipping every entry
+        db.timesheet_entries.aggregate([
+            {"$match": {**query, "date": {"$gte": month_start}}},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": "$hours"},
+                "billable": {"$sum": {"$cond": ["$is_billable", "$hours", 0]}}
+            }}
+        ]).to_list(1)
+    )
     
-    total_hours = sum(e.get("hours", 0) for e in timesheet_entries)
-    billable_hours = sum(e.get("hours", 0) for e in timesheet_entries if e.get("is_billable"))
+    leave_stats = leave_stats[0]
+    pending_leaves = leave_stats["pending"][0]["n"] if leave_stats["pending"] else 0
+    approved_leaves_month = leave_stats["approved_this_month"][0]["n"] if leave_stats["approved_this_month"] else 0
+    total_hours = hour_totals[0]["total"] if hour_totals else 0
+    billable_hours = hour_totals[0]["billable"] if hour_totals else 0
     
-    return {
+    return MongoJSONResponse({
         "employees": {
             "total": total_employees,
             "departments": total_departments,
@@ -1583,39 +2225,35 @@ async def get_reports_dashboard(user: dict = Depends(get_current_user)):
             "billable_hours_month": round(billable_hours, 1),
             "billable_rate": round((billable_hours / total_hours * 100) if total_hours > 0 else 0, 1)
         }
-    }
+    })
 
 @app.get("/api/reports/attendance")
 async def get_attendance_report(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     department_id: Optional[str] = None,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(require_manager)
 ):
     """Get attendance analytics"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     # Default to current month
+    now = datetime.now(timezone.utc)
     if not start_date:
-        start_date = datetime.now().strftime("%Y-%m-01")
+        start_date = now.strftime("%Y-%m-01")
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = now.date().isoformat()
     
-    query = {"date": {"$gte": start_date, "$lte": end_date}}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
-    
-    records = await db.attendance.find(query).to_list(5000)
+    query = {"date": {"$gte": start_date, "$lte": end_date}, **tenant_query(user)}
     
     # Get employees for department filter
-    emp_query = {}
-    if user.get("tenant_id"):
-        emp_query["tenant_id"] = user["tenant_id"]
+    emp_query = tenant_query(user)
     if department_id:
         emp_query["department_id"] = department_id
     
-    employees = await db.employees.find(emp_query).to_list(500)
+    records, employees, users = await asyncio.gather(
+        db.attendance.find(query, projection={"date": 1, "status": 1, "user_id": 1}).to_list(5000),
+        db.employees.find(emp_query, projection={"_id": 1}).to_list(500),
+        db.users.find({}, projection={"full_name": 1}).to_list(500)
+    )
     emp_ids = {str(e["_id"]): e for e in employees}
     
     # Daily breakdown
@@ -1640,8 +2278,7 @@ async def get_attendance_report(
             user_stats[uid] = {"present": 0, "absent": 0, "late": 0}
         user_stats[uid][r.get("status", "absent")] += 1
     
-    # Get user names
-    users = await db.users.find({}).to_list(500)
+    # User names
     user_map = {str(u["_id"]): u.get("full_name", "Unknown") for u in users}
     
     employee_data = [
@@ -1658,7 +2295,7 @@ async def get_attendance_report(
     total_present = sum(d.get("present", 0) for d in daily_data)
     total_absent = sum(d.get("absent", 0) for d in daily_data)
     
-    return {
+    return MongoJSONResponse({
         "period": {"start": start_date, "end": end_date},
         "summary": {
             "total_records": len(records),
@@ -1668,29 +2305,26 @@ async def get_attendance_report(
         },
         "daily_breakdown": daily_data,
         "employee_breakdown": sorted(employee_data, key=lambda x: x["attendance_rate"], reverse=True)
-    }
+    })
 
 @app.get("/api/reports/leave")
 async def get_leave_report(
     year: Optional[int] = None,
     department_id: Optional[str] = None,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(require_manager)
 ):
     """Get leave analytics"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     if not year:
         year = datetime.now().year
     
-    query = {"start_date": {"$gte": f"{year}-01-01", "$lte": f"{year}-12-31"}}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = {"start_date": {"$gte": f"{year}-01-01", "$lte": f"{year}-12-31"}, **tenant_query(user)}
     
-    leaves = await db.leave_requests.find(query).to_list(2000)
+    leaves, leave_types = await asyncio.gather(
+        db.leave_requests.find(query, projection={"leave_type_id": 1, "status": 1, "start_date": 1}).to_list(2000),
+        db.leave_types.find({}, projection={"name": 1}).to_list(50)
+    )
     
     # Leave type breakdown
-    leave_types = await db.leave_types.find({}).to_list(50)
     lt_map = {str(lt["_id"]): lt["name"] for lt in leave_types}
     
     type_breakdown = {}
@@ -1725,7 +2359,7 @@ async def get_leave_report(
     total_approved = sum(1 for l in leaves if l.get("status") == "approved")
     total_rejected = sum(1 for l in leaves if l.get("status") == "rejected")
     
-    return {
+    return MongoJSONResponse({
         "year": year,
         "summary": {
             "total_requests": len(leaves),
@@ -1736,22 +2370,20 @@ async def get_leave_report(
         },
         "by_type": type_data,
         "monthly_trend": monthly_data
-    }
+    })
 
 @app.get("/api/reports/utilization")
 async def get_utilization_report(
     month: Optional[int] = None,
     year: Optional[int] = None,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(require_manager)
 ):
     """Get team utilization and billable hours report"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+    now = datetime.now(timezone.utc)
     if not month:
-        month = datetime.now().month
+        month = now.month
     if not year:
-        year = datetime.now().year
+        year = now.year
     
     month_start = f"{year}-{str(month).zfill(2)}-01"
     if month == 12:
@@ -1759,11 +2391,14 @@ async def get_utilization_report(
     else:
         month_end = f"{year}-{str(month+1).zfill(2)}-01"
     
-    query = {"date": {"$gte": month_start, "$lt": month_end}}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = {"date": {"$gte": month_start, "$lt": month_end}, **tenant_query(user)}
     
-    entries = await db.timesheet_entries.find(query).to_list(5000)
+    entries, users, projects, clients = await asyncio.gather(
+        db.timesheet_entries.find(query).to_list(5000),
+        db.users.find({}, projection={"full_name": 1}).to_list(500),
+        db.projects.find({}, projection={"name": 1, "budget_hours": 1}).to_list(200),
+        db.clients.find({}, projection={"name": 1}).to_list(100)
+    )
     
     # User breakdown
     user_hours = {}
@@ -1775,8 +2410,7 @@ async def get_utilization_report(
         if e.get("is_billable"):
             user_hours[uid]["billable"] += e.get("hours", 0)
     
-    # Get user names
-    users = await db.users.find({}).to_list(500)
+    # User names
     user_map = {str(u["_id"]): u.get("full_name", "Unknown") for u in users}
     
     # Calculate working days in month (approx 22)
@@ -1810,11 +2444,8 @@ async def get_utilization_report(
         if e.get("is_billable"):
             project_hours[pid]["billable"] += e.get("hours", 0)
     
-    # Get project names
-    projects = await db.projects.find({}).to_list(200)
+    # Project names
     project_map = {str(p["_id"]): {"name": p["name"], "budget": p.get("budget_hours")} for p in projects}
-    
-    clients = await db.clients.find({}).to_list(100)
     client_map = {str(c["_id"]): c["name"] for c in clients}
     
     project_data = []
@@ -1836,7 +2467,7 @@ async def get_utilization_report(
     total_hours = sum(h["total"] for h in user_hours.values())
     total_billable = sum(h["billable"] for h in user_hours.values())
     
-    return {
+    return MongoJSONResponse({
         "period": {"month": month, "year": year},
         "summary": {
             "total_hours": round(total_hours, 1),
@@ -1847,20 +2478,17 @@ async def get_utilization_report(
         },
         "by_employee": user_data,
         "by_project": project_data[:10]  # Top 10 projects
-    }
+    })
 
 @app.get("/api/reports/department")
-async def get_department_report(user: dict = Depends(get_current_user)):
+async def get_department_report(user: dict = Depends(require_manager)):
     """Get department-wise breakdown"""
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     
-    departments = await db.departments.find(query).to_list(50)
-    employees = await db.employees.find({**query, "status": "active"}).to_list(500)
+    departments, employees = await asyncio.gather(
+        db.departments.find(query).to_list(50),
+        db.employees.find({**query, "status": "active"}, projection={"full_name": 1, "department_id": 1}).to_list(500)
+    )
     
     # Group employees by department
     dept_employees = {}
@@ -1885,18 +2513,15 @@ async def get_department_report(user: dict = Depends(get_current_user)):
     # Sort by employee count
     dept_data = sorted(dept_data, key=lambda x: x["employee_count"], reverse=True)
     
-    return {
+    return MongoJSONResponse({
         "total_departments": len(departments),
         "total_employees": len(employees),
         "departments": dept_data
-    }
+    })
 
 # Leave Type Routes
 @app.post("/api/leave-types")
-async def create_leave_type(lt: LeaveTypeCreate, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def create_leave_type(lt: LeaveTypeCreate, user: dict = Depends(require_hr)):
     lt_doc = {
         "name": lt.name,
         "code": lt.code,
@@ -1906,23 +2531,26 @@ async def create_leave_type(lt: LeaveTypeCreate, user: dict = Depends(get_curren
         "tenant_id": user.get("tenant_id"),
         "created_at": datetime.now(timezone.utc)
     }
-    result = await db.leave_types.insert_one(lt_doc)
-    return serialize_doc({**lt_doc, "_id": result.inserted_id})
+    await db.leave_types.insert_one(lt_doc)
+    # Super admins' all-tenant list is cached under None too, so every entry goes, not just this tenant's
+    _leave_types_cache.clear()
+    return serialize_doc(lt_doc)
 
 @app.get("/api/leave-types")
 async def get_leave_types(user: dict = Depends(get_current_user)):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     
-    leave_types = await db.leave_types.find(query).to_list(50)
-    return [serialize_doc(lt) for lt in leave_types]
+    leave_types = _leave_types_cache.get(query.get("tenant_id"))
+    if leave_types is None:
+        leave_types = [serialize_doc(lt) for lt in await db.leave_types.find(query).to_list(50)]
+        _leave_types_cache[query.get("tenant_id")] = leave_types
+    return MongoJSONResponse(leave_types)
 
 # Leave Request Routes
 @app.post("/api/leave-requests")
 async def create_leave_request(lr: LeaveRequestCreate, user: dict = Depends(get_current_user)):
     # Get employee for this user
-    employee = await db.employees.find_one({"email": user.get("email")})
+    employee = await db.employees.find_one({"email": user.get("email")}, projection={"_id": 1})
     
     lr_doc = {
         "employee_id": employee["_id"] if employee else None,
@@ -1936,8 +2564,8 @@ async def create_leave_request(lr: LeaveRequestCreate, user: dict = Depends(get_
         "tenant_id": user.get("tenant_id"),
         "created_at": datetime.now(timezone.utc)
     }
-    result = await db.leave_requests.insert_one(lr_doc)
-    return serialize_doc({**lr_doc, "_id": result.inserted_id})
+    await db.leave_requests.insert_one(lr_doc)
+    return MongoJSONResponse(serialize_doc(lr_doc))
 
 @app.get("/api/leave-requests")
 async def get_leave_requests(
@@ -1945,26 +2573,30 @@ async def get_leave_requests(
     employee_id: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     if status:
         query["status"] = status
     if employee_id:
-        query["employee_id"] = ObjectId(employee_id)
+        query["employee_id"] = parse_object_id(employee_id)
     elif user.get("role") == "employee":
         query["user_id"] = user.get("id")
     
-    requests = await db.leave_requests.find(query).to_list(100)
-    return [serialize_doc(r) for r in requests]
+    # Resolve the requester's name server-side instead of one employee lookup per request
+    return stream_docs(db.leave_requests.aggregate([
+        {"$match": query},
+        {"$limit": 100},
+        {"$lookup": {"from": "employees", "localField": "employee_id", "foreignField": "_id", "as": "employee"}},
+        {"$addFields": {
+            "employee_name": {"$arrayElemAt": ["$employee.full_name", 0]},
+            "employee_code": {"$arrayElemAt": ["$employee.employee_id", 0]}
+        }},
+        {"$project": {"employee": 0}}
+    ]))
 
 @app.put("/api/leave-requests/{req_id}/approve")
-async def approve_leave(req_id: str, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def approve_leave(req_id: str, user: dict = Depends(require_manager)):
     result = await db.leave_requests.update_one(
-        {"_id": ObjectId(req_id)},
+        {"_id": parse_object_id(req_id)},
         {"$set": {"status": "approved", "approved_by": user.get("id"), "approved_at": datetime.now(timezone.utc)}}
     )
     if result.matched_count == 0:
@@ -1972,12 +2604,9 @@ async def approve_leave(req_id: str, user: dict = Depends(get_current_user)):
     return {"message": "Leave approved"}
 
 @app.put("/api/leave-requests/{req_id}/reject")
-async def reject_leave(req_id: str, user: dict = Depends(get_current_user)):
-    if user.get("role") not in ["super_admin", "admin", "hr", "manager"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
+async def reject_leave(req_id: str, user: dict = Depends(require_manager)):
     result = await db.leave_requests.update_one(
-        {"_id": ObjectId(req_id)},
+        {"_id": parse_object_id(req_id)},
         {"$set": {"status": "rejected", "rejected_by": user.get("id"), "rejected_at": datetime.now(timezone.utc)}}
     )
     if result.matched_count == 0:
@@ -1987,49 +2616,49 @@ async def reject_leave(req_id: str, user: dict = Depends(get_current_user)):
 # Attendance Routes
 @app.post("/api/attendance/clock-in")
 async def clock_in(user: dict = Depends(get_current_user)):
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    existing = await db.attendance.find_one({
-        "user_id": user.get("id"),
-        "date": today
-    })
-    if existing and existing.get("check_in"):
-        raise HTTPException(status_code=400, detail="Already clocked in today")
-    
     now = datetime.now(timezone.utc)
-    if existing:
+    today = now.date().isoformat()
+    now_iso = now.isoformat()
+    # Single upsert; a record that already has check_in misses the filter and the
+    # unique (user_id, date) index turns the resulting insert into a duplicate key error.
+    # If legacy duplicates kept that index from being built, check for the record first
+    if not unique_index_enforced(db.attendance, [("user_id", ASCENDING), ("date", DESCENDING)]):
+        if await db.attendance.find_one(
+            {"user_id": user.get("id"), "date": today, "check_in": {"$ne": None}}, {"_id": 1}
+        ):
+            raise HTTPException(status_code=400, detail="Already clocked in today")
+    try:
         await db.attendance.update_one(
-            {"_id": existing["_id"]},
-            {"$set": {"check_in": now.isoformat(), "status": "present"}}
+            {"user_id": user.get("id"), "date": today, "check_in": None},
+            {
+                "$set": {"check_in": now_iso, "status": "present"},
+                "$setOnInsert": {"tenant_id": user.get("tenant_id"), "created_at": now}
+            },
+            upsert=True
         )
-    else:
-        await db.attendance.insert_one({
-            "user_id": user.get("id"),
-            "tenant_id": user.get("tenant_id"),
-            "date": today,
-            "check_in": now.isoformat(),
-            "status": "present",
-            "created_at": now
-        })
-    return {"message": "Clocked in successfully", "time": now.isoformat()}
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Already clocked in today")
+    return {"message": "Clocked in successfully", "time": now_iso}
 
 @app.post("/api/attendance/clock-out")
 async def clock_out(user: dict = Depends(get_current_user)):
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    existing = await db.attendance.find_one({
-        "user_id": user.get("id"),
-        "date": today
-    })
-    if not existing or not existing.get("check_in"):
-        raise HTTPException(status_code=400, detail="Not clocked in yet")
-    if existing.get("check_out"):
-        raise HTTPException(status_code=400, detail="Already clocked out today")
-    
     now = datetime.now(timezone.utc)
-    await db.attendance.update_one(
-        {"_id": existing["_id"]},
-        {"$set": {"check_out": now.isoformat()}}
+    today = now.date().isoformat()
+    now_iso = now.isoformat()
+    result = await db.attendance.update_one(
+        {"user_id": user.get("id"), "date": today, "check_in": {"$ne": None}, "check_out": None},
+        {"$set": {"check_out": now_iso}}
     )
-    return {"message": "Clocked out successfully", "time": now.isoformat()}
+    if result.matched_count == 0:
+        # Only the error path pays for a second read to pick the right message
+        existing = await db.attendance.find_one(
+            {"user_id": user.get("id"), "date": today},
+            projection={"check_in": 1}
+        )
+        if not existing or not existing.get("check_in"):
+            raise HTTPException(status_code=400, detail="Not clocked in yet")
+        raise HTTPException(status_code=400, detail="Already clocked out today")
+    return {"message": "Clocked out successfully", "time": now_iso}
 
 @app.get("/api/attendance")
 async def get_attendance(
@@ -2038,9 +2667,7 @@ async def get_attendance(
     user_id: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     if user.get("role") == "employee":
         query["user_id"] = user.get("id")
     elif user_id:
@@ -2050,39 +2677,48 @@ async def get_attendance(
     if end_date:
         query.setdefault("date", {})["$lte"] = end_date
     
-    records = await db.attendance.find(query).sort("date", -1).to_list(100)
-    return [serialize_doc(r) for r in records]
+    return stream_docs(db.attendance.find(query).sort("date", -1).limit(100))
 
 @app.get("/api/attendance/today")
 async def get_today_attendance(user: dict = Depends(get_current_user)):
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    today = datetime.now(timezone.utc).date().isoformat()
     record = await db.attendance.find_one({
         "user_id": user.get("id"),
         "date": today
     })
-    return serialize_doc(record) if record else None
+    return MongoJSONResponse(serialize_doc(record) if record else None)
 
 # Dashboard Stats
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(user: dict = Depends(get_current_user)):
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
+    query = tenant_query(user)
     
-    total_employees = await db.employees.count_documents({**query, "status": "active"})
-    total_departments = await db.departments.count_documents(query)
-    pending_leaves = await db.leave_requests.count_documents({**query, "status": "pending"})
+    today = datetime.now(timezone.utc).date().isoformat()
     
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    present_today = await db.attendance.count_documents({**query, "date": today, "status": "present"})
+    # All four counts in one round-trip: tag matching docs per collection, then group by tag
+    def tagged(match, tag):
+        return [{"$match": match}, {"$project": {"_id": 0, "k": {"$literal": tag}}}]
     
-    return {
+    pipeline = [
+        *tagged({**query, "status": "active"}, "employees"),
+        {"$unionWith": {"coll": "departments", "pipeline": tagged(query, "departments")}},
+        {"$unionWith": {"coll": "leave_requests", "pipeline": tagged({**query, "status": "pending"}, "pending_leaves")}},
+        {"$unionWith": {"coll": "attendance", "pipeline": tagged({**query, "date": today, "status": "present"}, "present_today")}},
+        {"$group": {"_id": "$k", "n": {"$sum": 1}}}
+    ]
+    counts = {c["_id"]: c["n"] async for c in db.employees.aggregate(pipeline)}
+    total_employees = counts.get("employees", 0)
+    total_departments = counts.get("departments", 0)
+    pending_leaves = counts.get("pending_leaves", 0)
+    present_today = counts.get("present_today", 0)
+    
+    return MongoJSONResponse({
         "total_employees": total_employees,
         "total_departments": total_departments,
         "pending_leaves": pending_leaves,
         "present_today": present_today,
         "attendance_rate": round((present_today / total_employees * 100) if total_employees > 0 else 0, 1)
-    }
+    })
 
 # Onboarding Models
 class OnboardingStatus(BaseModel):
@@ -2110,16 +2746,15 @@ class BulkEmployeeInvite(BaseModel):
 @app.get("/api/onboarding/status")
 async def get_onboarding_status(user: dict = Depends(get_current_user)):
     """Check if user has completed onboarding"""
-    query = {}
-    if user.get("tenant_id"):
-        query["tenant_id"] = user["tenant_id"]
-    
-    dept_count = await db.departments.count_documents(query)
-    leave_type_count = await db.leave_types.count_documents(query)
-    employee_count = await db.employees.count_documents(query)
-    
-    # Check if onboarding was explicitly completed
-    onboarding = await db.onboarding.find_one({"user_id": user.get("id")})
+    query = tenant_query(user)
+    
+    dept_count, leave_type_count, employee_count, onboarding = await asyncio.gather(
+        db.departments.count_documents(query),
+        db.leave_types.count_documents(query),
+        db.employees.count_documents(query),
+        # Check if onboarding was explicitly completed
+        db.onboarding.find_one({"user_id": user.get("id")}, projection={"_id": 0, "completed": 1})
+    )
     
     return {
         "departments_created": dept_count > 0,
@@ -2136,39 +2771,48 @@ async def get_onboarding_status(user: dict = Depends(get_current_user)):
 @app.post("/api/onboarding/departments")
 async def create_onboarding_departments(data: BulkDepartmentCreate, user: dict = Depends(get_current_user)):
     """Create multiple departments during onboarding"""
-    created = []
-    for dept in data.departments:
-        dept_doc = {
+    now = datetime.now(timezone.utc)
+    dept_docs = [
+        {
             "name": dept.name,
             "code": dept.code,
             "description": dept.description,
             "head_id": dept.head_id,
             "parent_id": dept.parent_id,
             "tenant_id": user.get("tenant_id"),
-            "created_at": datetime.now(timezone.utc),
+            "created_at": now,
             "is_active": True
         }
-        result = await db.departments.insert_one(dept_doc)
-        created.append(serialize_doc({**dept_doc, "_id": result.inserted_id}))
+        for dept in data.departments
+    ]
+    # One round-trip for the whole batch; insert_many fills in each doc's _id
+    if dept_docs:
+        await db.departments.insert_many(dept_docs)
+    created = [serialize_doc(d) for d in dept_docs]
+    _departments_cache.clear()
     
     return {"message": f"Created {len(created)} departments", "departments": created}
 
 @app.post("/api/onboarding/leave-types")
 async def create_onboarding_leave_types(data: BulkLeaveTypeCreate, user: dict = Depends(get_current_user)):
     """Create multiple leave types during onboarding"""
-    created = []
-    for lt in data.leave_types:
-        lt_doc = {
+    now = datetime.now(timezone.utc)
+    lt_docs = [
+        {
             "name": lt.name,
             "code": lt.code,
             "days_allowed": lt.days_allowed,
             "carry_forward": lt.carry_forward,
             "encashable": lt.encashable,
             "tenant_id": user.get("tenant_id"),
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         }
-        result = await db.leave_types.insert_one(lt_doc)
-        created.append(serialize_doc({**lt_doc, "_id": result.inserted_id}))
+        for lt in data.leave_types
+    ]
+    if lt_docs:
+        await db.leave_types.insert_many(lt_docs)
+    created = [serialize_doc(d) for d in lt_docs]
+    _leave_types_cache.clear()
     
     return {"message": f"Created {len(created)} leave types", "leave_types": created}
 
@@ -2179,73 +2823,98 @@ async def invite_onboarding_employees(
     user: dict = Depends(get_current_user)
 ):
     """Invite multiple employees during onboarding and send welcome emails"""
-    created = []
-    skipped = []
+    tenant_id = user.get("tenant_id")
+    now = datetime.now(timezone.utc)
     emails_queued = []
     
-    # Get email config
-    email_config = await get_email_config(user.get("tenant_id"))
+    # Get email config and the already registered employees and user accounts for the batch up front
+    emails = list({emp.email: None for emp in data.employees})
+    email_config, existing, existing_users = await asyncio.gather(
+        get_email_config(tenant_id),
+        db.employees.find(
+            {"tenant_id": tenant_id, "email": {"$in": emails}},
+            projection={"_id": 0, "email": 1}
+        ).to_list(None),
+        db.users.find({"email": {"$in": emails}}, projection={"_id": 0, "email": 1}).to_list(None)
+    )
+    seen = {e["email"] for e in existing}
+    user_emails = {u["email"] for u in existing_users}
     
-    for i, emp in enumerate(data.employees):
-        # Check if employee already exists
-        existing = await db.employees.find_one({
-            "email": emp.email,
-            "tenant_id": user.get("tenant_id")
-        })
-        if existing:
+    skipped = []
+    new_employees = []
+    for emp in data.employees:
+        if emp.email in seen:
             skipped.append(emp.email)
             continue
-        
-        # Generate temp password
-        temp_password = generate_temp_password()
-        
-        # Create employee record
-        emp_doc = {
-            "employee_id": f"EMP{str(i+1).zfill(4)}",
+        seen.add(emp.email)
+        new_employees.append(emp)
+    
+    # IDs come from the tenant's counter so concurrent or repeated batches don't reuse EMP0001..
+    employee_ids = await next_employee_ids(tenant_id, len(new_employees)) if new_employees else []
+    emp_docs = []
+    for employee_id, emp in zip(employee_ids, new_employees):
+        emp_docs.append({
+            "employee_id": employee_id,
             "full_name": emp.full_name,
             "email": emp.email,
             "department_id": emp.department_id,
             "designation": emp.designation,
             "employment_type": "full-time",
             "status": "active",
-            "tenant_id": user.get("tenant_id"),
-            "created_at": datetime.now(timezone.utc),
+            "tenant_id": tenant_id,
+            "created_at": now,
             "created_by": user.get("id"),
-            "invited": True
-        }
-        result = await db.employees.insert_one(emp_doc)
-        
-        # Create user account for employee
-        user_exists = await db.users.find_one({"email": emp.email})
-        if not user_exists:
-            await db.users.insert_one({
-                "email": emp.email,
-                "password": pwd_context.hash(temp_password),
-                "full_name": emp.full_name,
-                "role": "employee",
-                "tenant_id": user.get("tenant_id"),
-                "created_at": datetime.now(timezone.utc),
-                "is_active": True,
-                "must_change_password": True
-            })
-        
-        created.append(serialize_doc({**emp_doc, "_id": result.inserted_id}))
-        
-        # Queue welcome email if config exists
-        if email_config:
-            background_tasks.add_task(
-                send_welcome_email,
-                to_email=emp.email,
-                employee_name=emp.full_name,
-                temp_password=temp_password,
+            "invited": True,
+            **employee_search_fields(employee_id, emp.full_name, emp.email)
+        })
+    
+    # One batch for the employees; the unique index still catches concurrent invites
+    inserted, duplicates = await insert_many_skip_duplicates(db.employees, emp_docs)
+    skipped.extend(d["email"] for d in duplicates)
+    
+    # Generate temp passwords and create user accounts, skipping emails that already have one
+    temp_passwords = {d["email"]: generate_temp_password() for d in inserted}
+    new_users = [d for d in inserted if d["email"] not in user_emails]
+    # Hashed concurrently; the password-hash pool bounds how many run at once
+    hashed = await asyncio.gather(*(hash_password(temp_passwords[d["email"]]) for d in new_users))
+    user_docs = []
+    for d, password in zip(new_users, hashed):
+        user_docs.append({
+            "email": d["email"],
+            "password": password,
+            "full_name": d["full_name"],
+            "role": "employee",
+            "tenant_id": tenant_id,
+            "created_at": now,
+            "is_active": True,
+            "must_change_password": True
+        })
+    await insert_many_skip_duplicates(db.users, user_docs)
+    
+    created = [serialize_employee(d) for d in inserted]
+    
+    # Queue welcome emails if config exists, delivered as one batch over a single SMTP session
+    if email_config and inserted:
+        messages = [
+            build_welcome_email(
+                to_email=d["email"],
+                employee_name=d["full_name"],
+                temp_password=temp_passwords[d["email"]],
                 company_name=email_config.get("company_name", "BambooClone HR"),
                 smtp_email=email_config.get("smtp_email"),
-                smtp_password=email_config.get("smtp_password"),
-                smtp_host=email_config.get("smtp_host", "smtp.gmail.com"),
-                smtp_port=email_config.get("smtp_port", 587),
                 login_url=email_config.get("login_url", "")
             )
-            emails_queued.append(emp.email)
+            for d in inserted
+        ]
+        background_tasks.add_task(
+            send_messages,
+            messages,
+            smtp_email=email_config.get("smtp_email"),
+            smtp_password=email_config.get("smtp_password"),
+            smtp_host=email_config.get("smtp_host", "smtp.gmail.com"),
+            smtp_port=email_config.get("smtp_port", 587)
+        )
+        emails_queued.extend(d["email"] for d in inserted)
     
     return {
         "message": f"Invited {len(created)} employees",
@@ -2261,12 +2930,9 @@ async def complete_onboarding(user: dict = Depends(get_current_user)):
     await db.onboarding.update_one(
         {"user_id": user.get("id")},
         {
-            "$set": {
-                "user_id": user.get("id"),
-                "tenant_id": user.get("tenant_id"),
-                "completed": True,
-                "completed_at": datetime.now(timezone.utc)
-            }
+            "$set": {"completed": True, "completed_at": datetime.now(timezone.utc)},
+            # user_id comes from the filter on insert
+            "$setOnInsert": {"tenant_id": user.get("tenant_id")}
         },
         upsert=True
     )
@@ -2278,13 +2944,8 @@ async def skip_onboarding(user: dict = Depends(get_current_user)):
     await db.onboarding.update_one(
         {"user_id": user.get("id")},
         {
-            "$set": {
-                "user_id": user.get("id"),
-                "tenant_id": user.get("tenant_id"),
-                "completed": True,
-                "skipped": True,
-                "completed_at": datetime.now(timezone.utc)
-            }
+            "$set": {"completed": True, "skipped": True, "completed_at": datetime.now(timezone.utc)},
+            "$setOnInsert": {"tenant_id": user.get("tenant_id")}
         },
         upsert=True
     )
@@ -2292,11 +2953,8 @@ async def skip_onboarding(user: dict = Depends(get_current_user)):
 
 # Email Configuration Routes
 @app.get("/api/settings/email")
-async def get_email_settings(user: dict = Depends(get_current_user)):
+async def get_email_settings(user: dict = Depends(require_hr)):
     """Get email configuration (password masked)"""
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     config = await get_email_config(user.get("tenant_id"))
     if config:
         return {
@@ -2311,14 +2969,11 @@ async def get_email_settings(user: dict = Depends(get_current_user)):
     return {"configured": False}
 
 @app.post("/api/settings/email")
-async def save_email_settings(config: EmailConfigCreate, user: dict = Depends(get_current_user)):
+async def save_email_settings(config: EmailConfigCreate, user: dict = Depends(require_hr)):
     """Save email configuration"""
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     config_doc = {
         "smtp_email": config.smtp_email,
-        "smtp_password": config.smtp_password,
+        "smtp_password": encrypt_smtp_password(config.smtp_password),
         "smtp_host": config.smtp_host,
         "smtp_port": config.smtp_port,
         "company_name": config.company_name,
@@ -2332,20 +2987,18 @@ async def save_email_settings(config: EmailConfigCreate, user: dict = Depends(ge
         {"$set": config_doc},
         upsert=True
     )
+    _email_config_cache.pop(user.get("tenant_id") or None, None)
     
     return {"message": "Email configuration saved", "configured": True}
 
 @app.put("/api/settings/email")
-async def update_email_settings(config: EmailConfigUpdate, user: dict = Depends(get_current_user)):
+async def update_email_settings(config: EmailConfigUpdate, user: dict = Depends(require_hr)):
     """Update email configuration"""
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     update_data = {"updated_at": datetime.now(timezone.utc), "updated_by": user.get("id")}
     if config.smtp_email:
         update_data["smtp_email"] = config.smtp_email
     if config.smtp_password:
-        update_data["smtp_password"] = config.smtp_password
+        update_data["smtp_password"] = encrypt_smtp_password(config.smtp_password)
     if config.smtp_host:
         update_data["smtp_host"] = config.smtp_host
     if config.smtp_port:
@@ -2357,6 +3010,7 @@ async def update_email_settings(config: EmailConfigUpdate, user: dict = Depends(
         {"tenant_id": user.get("tenant_id")},
         {"$set": update_data}
     )
+    _email_config_cache.pop(user.get("tenant_id") or None, None)
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Email configuration not found")
@@ -2364,59 +3018,168 @@ async def update_email_settings(config: EmailConfigUpdate, user: dict = Depends(
     return {"message": "Email configuration updated"}
 
 @app.post("/api/settings/email/test")
-async def test_email_settings(user: dict = Depends(get_current_user)):
+async def test_email_settings(user: dict = Depends(require_hr)):
     """Send a test email to verify configuration"""
-    if user.get("role") not in ["super_admin", "admin", "hr"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     config = await get_email_config(user.get("tenant_id"))
     if not config:
         raise HTTPException(status_code=400, detail="Email not configured")
     
     try:
-        success = send_welcome_email(
-            to_email=user.get("email"),
-            employee_name=user.get("full_name"),
-            temp_password="TEST-PASSWORD-123",
-            company_name=config.get("company_name", "BambooClone HR"),
-            smtp_email=config.get("smtp_email"),
-            smtp_password=config.get("smtp_password"),
-            smtp_host=config.get("smtp_host", "smtp.gmail.com"),
-            smtp_port=config.get("smtp_port", 587),
-            login_url=config.get("login_url", "")
+        # Bounded so an unreachable SMTP host fails the request quickly instead of holding it open
+        success = await asyncio.wait_for(
+            send_welcome_email(
+                to_email=user.get("email"),
+                employee_name=user.get("full_name"),
+                temp_password="TEST-PASSWORD-123",
+                company_name=config.get("company_name", "BambooClone HR"),
+                smtp_email=config.get("smtp_email"),
+                smtp_password=config.get("smtp_password"),
+                smtp_host=config.get("smtp_host", "smtp.gmail.com"),
+                smtp_port=config.get("smtp_port", 587),
+                login_url=config.get("login_url", "")
+            ),
+            timeout=SMTP_TEST_TIMEOUT_SECONDS
         )
         if success:
             return {"message": "Test email sent successfully", "sent_to": user.get("email")}
         else:
             raise HTTPException(status_code=500, detail="Failed to send test email")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="SMTP timeout")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Email error: {str(e)}")
 
 @app.delete("/api/settings/email")
-async def delete_email_settings(user: dict = Depends(get_current_user)):
+async def delete_email_settings(user: dict = Depends(require_admin)):
     """Delete email configuration"""
-    if user.get("role") not in ["super_admin", "admin"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     result = await db.email_config.delete_one({"tenant_id": user.get("tenant_id")})
+    _email_config_cache.pop(user.get("tenant_id") or None, None)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Email configuration not found")
     
     return {"message": "Email configuration deleted"}
 
+# Indexes for the hot query predicates
+# (collection, index name) pairs whose unique index could not be built, see unique_index_enforced
+_unenforced_unique_indexes: set = set()
+
+def _index_name(keys: list) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+def unique_index_enforced(collection, keys: list) -> bool:
+    """False when ensure_unique_index fell back to a plain index, so callers must check themselves"""
+    return (collection.name, _index_name(keys)) not in _unenforced_unique_indexes
+
+async def ensure_unique_index(collection, keys: list) -> bool:
+    """Make keys unique in collection without ever leaving it unindexed
+
+    Rows written before the index existed may hold duplicates, which makes the build fail; that is
+    logged and the current (or a plain) index is kept so the app still starts. A non-unique index
+    on the same keys is only dropped once the unique one has been built next to it. Returns whether
+    the keys are unique, which unique_index_enforced reports later on.
+    """
+    name = _index_name(keys)
+    _unenforced_unique_indexes.discard((collection.name, name))
+    same_keys = {
+        index_name: info for index_name, info in (await collection.index_information()).items()
+        if [tuple(key) for key in info["key"]] == [tuple(key) for key in keys]
+    }
+    if any(info.get("unique") for info in same_keys.values()):
+        return True
+    try:
+        await collection.create_index(keys, unique=True, name=f"{name}_unique" if same_keys else name)
+    except OperationFailure as e:
+        print(f"Could not make {collection.name} {name} unique, existing rows have duplicates: {e}")
+        _unenforced_unique_indexes.add((collection.name, name))
+        if not same_keys:
+            await collection.create_index(keys)
+        return False
+    for index_name in same_keys:
+        await collection.drop_index(index_name)
+    return True
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_unique_index(db.users, [("email", ASCENDING)])
+    await db.employees.create_indexes([
+        # Not unique: invites now draw IDs from a counter, but earlier batches reused EMP0001.. per batch
+        IndexModel([("tenant_id", ASCENDING), ("employee_id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("status", ASCENDING), ("department_id", ASCENDING)]),
+        IndexModel([("email", ASCENDING)]),
+        IndexModel([("employee_id", ASCENDING)]),
+        # Single-field so every $or branch of the search stays indexed, with or without a tenant filter
+        IndexModel([("full_name_lc", ASCENDING)]),
+        IndexModel([("email_lc", ASCENDING)]),
+        IndexModel([("employee_id_lc", ASCENDING)]),
+        IndexModel(
+            [("full_name", TEXT), ("email", TEXT), ("employee_id", TEXT)],
+            name="employee_search", default_language="none"
+        ),
+    ])
+    await ensure_unique_index(db.employees, [("tenant_id", ASCENDING), ("email", ASCENDING)])
+    await db.attendance.create_index([("tenant_id", ASCENDING), ("date", ASCENDING), ("status", ASCENDING)])
+    await ensure_unique_index(db.attendance, [("user_id", ASCENDING), ("date", DESCENDING)])
+    await db.leave_requests.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("start_date", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("employee_id", ASCENDING)]),
+    ])
+    await db.departments.create_index([("tenant_id", ASCENDING)])
+    await db.leave_types.create_index([("tenant_id", ASCENDING)])
+    await db.clients.create_index([("tenant_id", ASCENDING), ("name", ASCENDING)])
+    await db.projects.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("name", ASCENDING)]),
+        IndexModel([("client_id", ASCENDING)]),
+    ])
+    await db.tasks.create_index([("tenant_id", ASCENDING), ("project_id", ASCENDING)])
+    # One entry per user, day, project and task; single and bulk saves upsert on this key
+    await ensure_unique_index(db.timesheet_entries, [
+        ("user_id", ASCENDING), ("date", ASCENDING), ("project_id", ASCENDING), ("task_id", ASCENDING)
+    ])
+    await db.timesheet_entries.create_indexes([
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("date", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("project_id", ASCENDING)]),
+    ])
+    await db.password_resets.create_indexes([
+        IndexModel([("email", ASCENDING)]),
+        IndexModel([("token", ASCENDING)]),
+        # Expired reset tokens are removed by the server instead of piling up
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ])
+    # Both collections hold one document per key, written by upsert; unique stops concurrent upserts
+    # from inserting twice. Deployments with the earlier non-unique index get it replaced, but only
+    # once the unique build has succeeded
+    await ensure_unique_index(db.onboarding, [("user_id", ASCENDING)])
+    await ensure_unique_index(db.email_config, [("tenant_id", ASCENDING)])
+
+# Backfill the lower-cased search fields on employees written before they existed
+@app.on_event("startup")
+async def backfill_employee_search_fields():
+    await db.employees.update_many(
+        {"full_name_lc": {"$exists": False}},
+        [{"$addFields": {
+            "employee_id_lc": {"$toLower": "$employee_id"},
+            "full_name_lc": {"$toLower": "$full_name"},
+            "email_lc": {"$toLower": "$email"}
+        }}]
+    )
+
 # Seed initial super admin
 @app.on_event("startup")
 async def seed_data():
-   admin = await db.users.find_one({"email": "admin@bambooclone.com"})
+    admin = await db.users.find_one({"email": "admin@bambooclone.com"}, projection={"_id": 1})
     if not admin:
         await db.users.insert_one({
-           "email": "admin@bambooclone.com",
-            "password": pwd_context.hash("admin123"),
+            "email": "admin@bambooclone.com",
+            "password": await hash_password("admin123"),
             "full_name": "Super Admin",
-           "role": "super_admin",
+            "role": "super_admin",
             "tenant_id": None,
             "created_at": datetime.now(timezone.utc),
-           "is_active": True
+            "is_active": True
         })
         print("Seeded super admin: admin@bambooclone.com / admin123")
 